@@ -0,0 +1,81 @@
+"""Compara um resultado de benchmark com o baseline salvo.
+
+Uso:
+    python -m benchmarks.compare base.json atual.json --threshold 0.1
+
+Sai com código 1 se algum benchmark ficou mais lento que o limite.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(baseline: dict, current: dict, threshold: float):
+    rows = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append((name, None, result['median'], None, 'new'))
+            continue
+
+        ratio = result['median'] / base['median']
+        if ratio > 1 + threshold:
+            status = 'REGRESSION'
+        elif ratio < 1 - threshold:
+            status = 'faster'
+        else:
+            status = 'ok'
+        rows.append((
+            name,
+            base['median'],
+            result['median'],
+            ratio,
+            status,
+        ))
+
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0]
+    )
+    parser.add_argument('baseline', type=Path)
+    parser.add_argument('current', type=Path)
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=0.10,
+        help='variação relativa tolerada na mediana (padrão: 0.10)',
+    )
+    args = parser.parse_args(argv)
+
+    rows = compare(
+        json.loads(args.baseline.read_text()),
+        json.loads(args.current.read_text()),
+        args.threshold,
+    )
+
+    for name, base, current, ratio, status in rows:
+        base_us = f'{base * 1e6:.2f}' if base is not None else '-'
+        ratio_text = f'{ratio:.2f}x' if ratio is not None else '-'
+        print(
+            f'{name:<40} {base_us:>12} {current * 1e6:>12.2f} us '
+            f'{ratio_text:>8} {status}'
+        )
+
+    regressions = [row for row in rows if row[4] == 'REGRESSION']
+    if regressions:
+        print(
+            f'{len(regressions)} regressão(ões) acima de '
+            f'{args.threshold:.0%}',
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""Gerador de carga ponta a ponta contra fastapi_zero.app:app.
+
+Por padrão roda a aplicação no próprio processo via ASGI, sobre um
+SQLite em arquivo semeado com N usuários (as tabelas de --db são
+recriadas). Com --url, dispara contra um uvicorn local que use o mesmo
+arquivo como DATABASE_URL. Pool e pragmas seguem as variáveis de
+ambiente de Settings, o que permite comparar configurações.
+
+Uso:
+    python -m benchmarks.load --users 20 --duration 30
+    python -m benchmarks.load --mix list=90,create=5,patch=4,login=1
+    DATABASE_POOL_SIZE=20 python -m benchmarks.load --output run.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault(
+    'SECRET_KEY', 'loadtest-secret-key-0123456789abcdef'
+)
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+# Todos os usuários virtuais logam do mesmo IP: sem folga nos limites
+# de login a carga mede 429 em vez da aplicação. Com --url, o uvicorn
+# precisa das mesmas variáveis.
+for _name in ('LOGIN_IP', 'LOGIN_USERNAME'):
+    os.environ.setdefault(f'{_name}_BURST', '1000000')
+    os.environ.setdefault(f'{_name}_PER_MINUTE', '1000000')
+
+import httpx  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+
+from fastapi_zero.app import app  # noqa: E402
+from fastapi_zero.database import (  # noqa: E402
+    create_engine_from_settings,
+    get_read_session,
+    get_session,
+)
+from fastapi_zero.models import (  # noqa: E402
+    Todo,
+    TodoState,
+    User,
+    table_registry,
+)
+from fastapi_zero.security import get_password_hash  # noqa: E402
+from fastapi_zero.settings import Settings  # noqa: E402
+
+DEFAULT_MIX = 'list=80,create=10,patch=8,login=2'
+PASSWORD = 'loadtest-password'
+
+
+def parse_mix(text: str):
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(
+                f'operação inválida: {name}'
+            )
+        mix[name] = float(weight)
+    return mix
+
+
+async def seed(
+    engine, users: int, todos_per_user: int, seed_value: int
+):
+    rng = random.Random(seed_value)
+    # Um único hash reaproveitado: semear não deve custar N argon2
+    password = get_password_hash(PASSWORD)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    'username': f'load{index}',
+                    'email': f'load{index}@example.com',
+                    'password': password,
+                }
+                for index in range(1, users + 1)
+            ],
+        )
+        if todos_per_user:
+            await conn.execute(
+                insert(Todo),
+                [
+                    {
+                        'title': f'todo {index}',
+                        'description': 'carga inicial',
+                        'state': rng.choice(list(TodoState)),
+                        'user_id': user_id,
+                    }
+                    for user_id in range(1, users + 1)
+                    for index in range(todos_per_user)
+                ],
+            )
+
+
+class VirtualUser:
+    def __init__(self, client, index: int, rng: random.Random):
+        self.client = client
+        self.email = f'load{index}@example.com'
+        self.rng = rng
+        self.headers = {}
+        self.todo_ids = []
+
+    async def login(self):
+        response = await self.client.post(
+            '/auth/token',
+            data={'username': self.email, 'password': PASSWORD},
+        )
+        if response.status_code == httpx.codes.OK:
+            token = response.json()['access_token']
+            self.headers = {'Authorization': f'Bearer {token}'}
+        return response
+
+    async def list(self):
+        response = await self.client.get(
+            '/todos/', headers=self.headers
+        )
+        if response.status_code == httpx.codes.OK:
+            self.todo_ids = [
+                t['id'] for t in response.json()['todos']
+            ]
+        return response
+
+    async def create(self):
+        response = await self.client.post(
+            '/todos/',
+            headers=self.headers,
+            json={
+                'title': f'carga {self.rng.randrange(10**6)}',
+                'description': 'criado pelo gerador de carga',
+            },
+        )
+        if response.status_code == httpx.codes.OK:
+            self.todo_ids.append(response.json()['id'])
+        return response
+
+    async def patch(self):
+        if not self.todo_ids:
+            return await self.create()
+        return await self.client.patch(
+            f'/todos/{self.rng.choice(self.todo_ids)}',
+            headers=self.headers,
+            json={'state': self.rng.choice(list(TodoState)).value},
+        )
+
+
+OPERATIONS = {
+    'list': ('GET /todos/', VirtualUser.list),
+    'create': ('POST /todos/', VirtualUser.create),
+    'patch': ('PATCH /todos/{id}', VirtualUser.patch),
+    'login': ('POST /auth/token', VirtualUser.login),
+}
+
+
+async def run_user(user, mix, deadline, samples):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    await timed(samples, OPERATIONS['login'][0], user.login)
+
+    while time.perf_counter() < deadline:
+        route, operation = OPERATIONS[
+            user.rng.choices(names, weights)[0]
+        ]
+        await timed(samples, route, lambda: operation(user))
+
+
+async def timed(samples, route, call):
+    start = time.perf_counter()
+    try:
+        response = await call()
+        ok = response.status_code < httpx.codes.BAD_REQUEST
+    except httpx.HTTPError:
+        ok = False
+    samples[route].append((time.perf_counter() - start, ok))
+
+
+def percentile(latencies, q):
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method='inclusive')[
+        q - 1
+    ]
+
+
+def summarize(samples, elapsed: float):
+    routes = {}
+    total = 0
+    for route, route_samples in sorted(samples.items()):
+        latencies = [latency for latency, _ in route_samples]
+        errors = sum(1 for _, ok in route_samples if not ok)
+        total += len(route_samples)
+        routes[route] = {
+            'requests': len(route_samples),
+            'throughput': len(route_samples) / elapsed,
+            'error_rate': errors / len(route_samples),
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+        }
+    return {
+        'elapsed': elapsed,
+        'requests': total,
+        'throughput': total / elapsed,
+        'routes': routes,
+    }
+
+
+async def main_async(args):
+    settings = Settings(DATABASE_URL=f'sqlite+aiosqlite:///{args.db}')
+    engine = create_engine_from_settings(settings)
+    await seed(engine, args.users, args.todos, args.seed)
+
+    if args.url:
+        transport = None
+        base_url = args.url
+    else:
+
+        async def get_load_session():
+            async with AsyncSession(
+                engine, expire_on_commit=False
+            ) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_load_session
+        app.dependency_overrides[get_read_session] = get_load_session
+        transport = httpx.ASGITransport(app=app)
+        base_url = 'http://loadtest'
+
+    samples = defaultdict(list)
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=30
+    ) as client:
+        users = [
+            VirtualUser(
+                client, index, random.Random(args.seed + index)
+            )
+            for index in range(1, args.users + 1)
+        ]
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(
+            *(
+                run_user(user, args.mix, deadline, samples)
+                for user in users
+            )
+        )
+        elapsed = time.perf_counter() - start
+
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    return summarize(samples, elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0]
+    )
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--todos', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX)
+    parser.add_argument('--seed', type=int, default=20250520)
+    parser.add_argument(
+        '--db',
+        type=Path,
+        default=Path(tempfile.gettempdir()) / 'fastapi_zero_load.db',
+    )
+    parser.add_argument(
+        '--url', help='alvo HTTP (ex.: uvicorn local)'
+    )
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args(argv)
+
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    report = asyncio.run(main_async(args))
+
+    print(
+        f'{report["requests"]} requisições em '
+        f'{report["elapsed"]:.1f}s '
+        f'({report["throughput"]:.1f} req/s)',
+        file=sys.stderr,
+    )
+    for route, stats in report['routes'].items():
+        print(
+            f'{route:<20} {stats["requests"]:>7} '
+            f'{stats["throughput"]:>8.1f}/s '
+            f'p50 {stats["p50_ms"]:>7.1f}ms '
+            f'p95 {stats["p95_ms"]:>7.1f}ms '
+            f'p99 {stats["p99_ms"]:>7.1f}ms '
+            f'erros {stats["error_rate"]:.1%}',
+            file=sys.stderr,
+        )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
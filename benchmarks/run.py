@@ -0,0 +1,237 @@
+"""Micro-benchmarks dos caminhos quentes de segurança e serialização.
+
+Uso:
+    python -m benchmarks.run --output benchmarks/results/atual.json
+    python -m benchmarks.run --sizes 10 1000 --only serialize
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Valores padrão para rodar sem configuração; o ambiente prevalece
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault(
+    'SECRET_KEY', 'benchmark-secret-key-0123456789abcdef'
+)
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+
+from jwt import decode  # noqa: E402
+
+from fastapi_zero.models import Todo, TodoState  # noqa: E402
+from fastapi_zero.routers.todos import (  # noqa: E402
+    todo_list_adapter,
+    todo_row,
+)
+from fastapi_zero.schemas import TodoList, TodoPublic  # noqa: E402
+from fastapi_zero.security import (  # noqa: E402
+    create_access_token,
+    decode_token,
+    pwd_context,
+    settings,
+    token_cache,
+)
+
+SEED = 20250520
+DEFAULT_SIZES = [10, 100, 1_000, 10_000, 100_000]
+MIN_ROUND_TIME = 0.05
+MAX_LOOPS = 1_000_000
+# Listas grandes já levam mais que MIN_ROUND_TIME em uma chamada
+LARGE_SIZE = 10_000
+
+
+def measure(func, rounds: int, min_time=MIN_ROUND_TIME):
+    # Calibra quantas chamadas cabem numa rodada de ~min_time segundos
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= MAX_LOOPS:
+            break
+        loops *= 2
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        timings.append((time.perf_counter() - start) / loops)
+
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'mean': statistics.fmean(timings),
+        'stdev': statistics.stdev(timings) if rounds > 1 else 0.0,
+        'rounds': rounds,
+        'loops': loops,
+    }
+
+
+def make_todos(size: int, seed=SEED):
+    rng = random.Random(seed)
+    states = list(TodoState)
+    base = datetime(2025, 5, 20)
+    todos = []
+    for index in range(1, size + 1):
+        todo = Todo(
+            title=f'todo {index} {rng.randrange(10**6)}',
+            description=' '.join(
+                rng.choice(['comprar', 'estudar', 'ler', 'fastapi'])
+                for _ in range(rng.randint(3, 12))
+            ),
+            state=rng.choice(states),
+            user_id=1,
+        )
+        todo.id = index
+        todo.created_at = base + timedelta(seconds=index)
+        todo.updated_at = todo.created_at
+        todos.append(todo)
+    return todos
+
+
+def bench_security(rounds: int):
+    data = {'sub': 'bench@example.com'}
+    token = create_access_token(data)
+
+    def decode_uncached():
+        decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+        )
+
+    def decode_cached():
+        decode_token(token)
+
+    token_cache.clear()
+    decode_token(token)
+
+    return {
+        'security.create_access_token': measure(
+            lambda: create_access_token(data), rounds
+        ),
+        'security.decode.uncached': measure(decode_uncached, rounds),
+        'security.decode.cached': measure(decode_cached, rounds),
+    }
+
+
+def bench_password(rounds: int):
+    hashed = pwd_context.hash('benchmark-password')
+    return {
+        'password.hash': measure(
+            lambda: pwd_context.hash('benchmark-password'),
+            rounds,
+            min_time=0,
+        ),
+        'password.verify': measure(
+            lambda: pwd_context.verify('benchmark-password', hashed),
+            rounds,
+            min_time=0,
+        ),
+    }
+
+
+def bench_serialize(rounds: int, sizes):
+    results = {}
+    single = make_todos(1)[0]
+    results['serialize.todo_public'] = measure(
+        lambda: TodoPublic.model_validate(
+            single, from_attributes=True
+        ).model_dump_json(),
+        rounds,
+    )
+
+    for size in sizes:
+        todos = make_todos(size)
+
+        def serialize(todos=todos):
+            TodoList.model_validate(
+                {'todos': todos}, from_attributes=True
+            ).model_dump_json()
+
+        def serialize_fast(todos=todos):
+            todo_list_adapter.dump_json({
+                'todos': [todo_row(todo) for todo in todos],
+                'next_cursor': None,
+            })
+
+        min_time = 0 if size >= LARGE_SIZE else MIN_ROUND_TIME
+        results[f'serialize.todo_list[{size}]'] = measure(
+            serialize, rounds, min_time=min_time
+        )
+        results[f'serialize.todo_list_fast[{size}]'] = measure(
+            serialize_fast, rounds, min_time=min_time
+        )
+
+    return results
+
+
+GROUPS = {
+    'security': lambda args: bench_security(args.rounds),
+    'password': lambda args: bench_password(args.rounds),
+    'serialize': lambda args: bench_serialize(
+        args.rounds, args.sizes
+    ),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0]
+    )
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument(
+        '--sizes', type=int, nargs='+', default=DEFAULT_SIZES
+    )
+    parser.add_argument(
+        '--only',
+        choices=sorted(GROUPS),
+        nargs='+',
+        default=sorted(GROUPS),
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    for group in args.only:
+        for name, result in GROUPS[group](args).items():
+            results[name] = result
+            print(
+                f'{name:<40} {result["median"] * 1e6:>14.2f} us '
+                f'(min {result["min"] * 1e6:.2f})',
+                file=sys.stderr,
+            )
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(
+                timespec='seconds'
+            ),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': SEED,
+            'rounds': args.rounds,
+        },
+        'results': results,
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload + '\n')
+    else:
+        print(payload)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,22 @@
+import logging
 from http import HTTPStatus
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 
+from fastapi_zero.lifespan import lifespan
+from fastapi_zero.metrics import MetricsMiddleware, render_metrics
+from fastapi_zero.observability import ServerTimingMiddleware
 from fastapi_zero.routers import auth, todos, users
 from fastapi_zero.schemas import (
     Message,
 )
+from fastapi_zero.settings import Settings
 
-app = FastAPI()
+logging.basicConfig(level=Settings().LOG_LEVEL)
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(todos.router)
@@ -16,3 +25,9 @@ app.include_router(todos.router)
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
 def read_root():
     return {'message': 'Olá mundo!'}
+
+
+@app.get('/metrics', include_in_schema=False)
+def read_metrics():
+    body, media_type = render_metrics()
+    return Response(body, media_type=media_type)
@@ -0,0 +1,155 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi_zero.settings import Settings
+
+settings = Settings()
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Chamado com 'hit', 'miss', 'eviction' ou 'resize' no momento
+        # do evento (as métricas contam por processo, sem snapshot)
+        self.listener = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[2] is not None:
+                if entry[2] <= time.time():
+                    self._pop(key)
+                    self._notify('resize')
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+                self._notify('miss')
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._notify('hit')
+            return entry[0]
+
+    def set(self, key, value, size=0, expires_at=None):
+        if expires_at is None and self.ttl:
+            expires_at = time.time() + self.ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+            self._entries[key] = (value, size, expires_at)
+            self.size_bytes += size
+
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes and self.size_bytes > self.max_bytes
+            ):
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+                self._notify('eviction')
+
+            self._notify('resize')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+            self._notify('resize')
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'size_bytes': self.size_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
+
+    def _pop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def _notify(self, event):
+        if self.listener is not None:
+            self.listener(event)
+
+
+token_cache = LRUCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
+todo_list_cache = LRUCache(
+    max_entries=settings.TODO_CACHE_MAX_ENTRIES,
+    ttl=settings.TODO_CACHE_TTL,
+    max_bytes=settings.TODO_CACHE_MAX_BYTES,
+)
+
+# Geração por usuário: toda escrita gera um número novo e as entradas
+# antigas deixam de ser alcançáveis (e saem pelo LRU/TTL).
+_generations = itertools.count(1)
+user_generations: dict[int, int] = {}
+
+
+def user_generation(user_id: int) -> int:
+    return user_generations.get(user_id, 0)
+
+
+# Momento da última escrita de cada usuário (read-your-writes)
+user_writes: dict[int, float] = {}
+
+# Início da última cópia da réplica que terminou (refresh periódico)
+replica_sync: dict[str, float | None] = {'started_at': None}
+
+
+def mark_replica_synced(started_at: float):
+    replica_sync['started_at'] = started_at
+
+
+def replica_tracked() -> bool:
+    return bool(
+        settings.DATABASE_READ_URL
+        and settings.SQLITE_REPLICA_REFRESH_SECONDS
+    )
+
+
+def invalidate_user(user_id: int):
+    user_generations[user_id] = next(_generations)
+    user_writes[user_id] = time.monotonic()
+
+
+def wrote_recently(user_id: int) -> bool:
+    written_at = user_writes.get(user_id)
+    if written_at is None:
+        return False
+
+    if replica_tracked():
+        # Réplica copiada por nós: fica no primário até terminar uma
+        # cópia iniciada depois da escrita, seja qual for o intervalo
+        started_at = replica_sync['started_at']
+        caught_up = started_at is not None and started_at > written_at
+    else:
+        # Replicação externa: a janela precisa cobrir o atraso dela
+        caught_up = (
+            time.monotonic() - written_at
+            >= settings.READ_YOUR_WRITES_SECONDS
+        )
+
+    if caught_up:
+        user_writes.pop(user_id, None)
+        return False
+    return True
@@ -0,0 +1,27 @@
+import hashlib
+from http import HTTPStatus
+
+from fastapi import Response
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    # If-None-Match usa comparação fraca: W/"x" equivale a "x"
+    tags = {
+        tag.strip().removeprefix('W/')
+        for tag in if_none_match.split(',')
+    }
+    return '*' in tags or etag.removeprefix('W/') in tags
+
+
+def not_modified(etag: str) -> Response:
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+    )
@@ -1,8 +1,102 @@
+import logging
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 
 from fastapi_zero.settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+
+def sqlite_pragmas(settings: Settings):
+    return {
+        'journal_mode': settings.SQLITE_JOURNAL_MODE,
+        'synchronous': settings.SQLITE_SYNCHRONOUS,
+        'busy_timeout': settings.SQLITE_BUSY_TIMEOUT,
+        'mmap_size': settings.SQLITE_MMAP_SIZE,
+        'cache_size': settings.SQLITE_CACHE_SIZE,
+    }
+
+
+def sqlite_path(url) -> str:
+    # URLs no formato URI (file:replica.db?mode=ro&uri=true)
+    return make_url(url).database.removeprefix('file:')
+
+
+def create_engine_from_settings(
+    settings: Settings, url=None, read_only=False
+):
+    url = make_url(url or settings.DATABASE_URL)
+    options = {
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+    }
+    # SQLite em memória usa StaticPool, que não aceita tamanho de pool
+    if url.database not in {None, '', ':memory:'}:
+        options['pool_size'] = settings.DATABASE_POOL_SIZE
+        options['max_overflow'] = settings.DATABASE_MAX_OVERFLOW
+
+    engine = create_async_engine(url, **options)
+    pragmas = (
+        sqlite_pragmas(settings)
+        if url.get_backend_name() == 'sqlite'
+        else {}
+    )
+    if read_only:
+        # Trocar o journal_mode exige escrita no arquivo
+        pragmas.pop('journal_mode', None)
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
+    def log_engine_ready(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        effective = {}
+        for name in pragmas:
+            cursor.execute(f'PRAGMA {name}')
+            # mmap_size não retorna linha em bancos :memory:
+            row = cursor.fetchone()
+            effective[name] = row[0] if row else None
+        cursor.close()
+        logger.info(
+            'database engine ready: url=%s pool=%s %s',
+            url.render_as_string(hide_password=True),
+            engine.pool.status(),
+            ' '.join(f'{k}={v}' for k, v in effective.items()),
+        )
+
+    if pragmas:
+        event.listen(engine.sync_engine, 'connect', set_pragmas)
+    event.listen(
+        engine.sync_engine, 'connect', log_engine_ready, once=True
+    )
+
+    return engine
+
+
+def refresh_sqlite_replica(source: str, replica: str):
+    # Cópia consistente via backup API, mesmo com escritas em curso
+    with (
+        sqlite3.connect(sqlite_path(source)) as source_db,
+        sqlite3.connect(sqlite_path(replica)) as replica_db,
+    ):
+        source_db.backup(replica_db)
+
+
+settings = Settings()
+engine = create_engine_from_settings(settings)
+read_engine = (
+    create_engine_from_settings(
+        settings, url=settings.DATABASE_READ_URL, read_only=True
+    )
+    if settings.DATABASE_READ_URL
+    else engine
+)
 
 
 async def get_session():  # pragma: no cover
@@ -10,3 +104,10 @@ async def get_session():  # pragma: no cover
         engine, expire_on_commit=False
     ) as session:
         yield session
+
+
+async def get_read_session():  # pragma: no cover
+    async with AsyncSession(
+        read_engine, expire_on_commit=False
+    ) as session:
+        yield session
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict, deque
+
+from fastapi_zero.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+# Sinal de fim para assinante lento: a fila foi descartada e o
+# cliente precisa ressincronizar por /todos/changes
+DROPPED = None
+
+
+class Subscription:
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+
+class SQLiteEventRelay:
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, retention: float):
+        self.path = path
+        self.retention = retention
+        self.origin = os.getpid()
+        self.last_id = None
+        self.polls = 0
+        self._pending = deque()
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.path,
+                timeout=1,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS todo_events ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'origin INTEGER, user_id INTEGER, payload TEXT, '
+                'created_at REAL)'
+            )
+        return self._connection
+
+    def append(self, user_id: int, event: dict):
+        # Chamado no event loop: só enfileira, a escrita fica para a
+        # thread do relay (deque.append é thread-safe)
+        self._pending.append((user_id, event, time.time()))
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        rows = []
+        while self._pending:
+            user_id, event, created_at = self._pending.popleft()
+            rows.append((
+                self.origin,
+                user_id,
+                json.dumps(event),
+                created_at,
+            ))
+        if not rows:
+            return
+
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(
+                'INSERT INTO todo_events '
+                '(origin, user_id, payload, created_at) '
+                'VALUES (?, ?, ?, ?)',
+                rows,
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def poll(self):
+        with self._lock:
+            self._flush()
+            return self._poll()
+
+    def _poll(self):
+        if self.last_id is None:
+            # Só interessa o que for publicado daqui em diante
+            self.last_id = self.connection.execute(
+                'SELECT coalesce(max(id), 0) FROM todo_events'
+            ).fetchone()[0]
+
+        rows = self.connection.execute(
+            'SELECT id, origin, user_id, payload FROM todo_events '
+            'WHERE id > ? ORDER BY id',
+            (self.last_id,),
+        ).fetchall()
+        if rows:
+            self.last_id = rows[-1][0]
+
+        self.polls += 1
+        if self.polls % self.PRUNE_EVERY == 0:
+            self.connection.execute(
+                'DELETE FROM todo_events WHERE created_at < ?',
+                (time.time() - self.retention,),
+            )
+
+        # Eventos deste processo já foram entregues localmente
+        return [
+            (user_id, json.loads(payload))
+            for _, origin, user_id, payload in rows
+            if origin != self.origin
+        ]
+
+    async def run(self, broker, interval: float):
+        try:
+            while True:
+                try:
+                    for user_id, event in await asyncio.to_thread(
+                        self.poll
+                    ):
+                        broker.deliver(user_id, event)
+                except Exception:
+                    logger.exception('todo event relay poll failed')
+                await asyncio.sleep(interval)
+        finally:
+            # No shutdown, grava o que ainda está na fila
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception('todo event relay flush failed')
+
+
+class EventBroker:
+    def __init__(self, queue_size: int, relay=None):
+        self.queue_size = queue_size
+        self.relay = relay
+        self.dropped = 0
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscribers = self._subscribers.get(subscription.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int, event: dict):
+        self.deliver(user_id, event)
+        if self.relay is not None:
+            self.relay.append(user_id, event)
+
+    def deliver(self, user_id: int, event: dict):
+        # Nunca bloqueia quem publica: fila cheia derruba o assinante
+        for subscription in list(self._subscribers.get(user_id, ())):
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.drop(subscription)
+
+    def drop(self, subscription: Subscription):
+        self.unsubscribe(subscription)
+        self.dropped += 1
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(DROPPED)
+
+
+event_broker = EventBroker(
+    settings.TODO_EVENTS_QUEUE_SIZE,
+    relay=SQLiteEventRelay(
+        settings.TODO_EVENTS_RELAY_PATH,
+        settings.TODO_EVENTS_RELAY_RETENTION_SECONDS,
+    )
+    if settings.TODO_EVENTS_RELAY == 'sqlite'
+    else None,
+)
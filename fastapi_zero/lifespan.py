@@ -0,0 +1,164 @@
+import asyncio
+import inspect
+import logging
+import time
+from contextlib import asynccontextmanager
+from time import perf_counter
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from fastapi_zero.cache import mark_replica_synced
+from fastapi_zero.database import (
+    engine,
+    read_engine,
+    refresh_sqlite_replica,
+)
+from fastapi_zero.events import event_broker
+from fastapi_zero.maintenance import compact_tombstones
+from fastapi_zero.metrics import STARTUP_DURATION, mark_process_dead
+from fastapi_zero.security import (
+    get_password_hash,
+    password_hash_pool,
+)
+from fastapi_zero.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+
+async def warm_up_database(
+    async_engine: AsyncEngine, connections: int
+):
+    size = getattr(async_engine.pool, 'size', None)
+    if size is not None:
+        connections = min(connections, size())
+
+    # Abre todas antes de devolver: o pool guarda cada uma delas
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = await async_engine.connect()
+            opened.append(connection)
+            await connection.exec_driver_sql('SELECT 1')
+    finally:
+        for connection in opened:
+            await connection.close()
+
+
+async def warm_up_password_hash():
+    # Sobe os workers do pool (processos, se configurado) e o argon2
+    await password_hash_pool.run(get_password_hash, 'warm-up')
+
+
+def warm_up_openapi(app):
+    app.openapi()
+
+
+async def run_warm_up(app):
+    phases = {}
+
+    async def phase(name, step):
+        start = perf_counter()
+        result = step()
+        if inspect.isawaitable(result):
+            await result
+        phases[name] = perf_counter() - start
+
+    await phase(
+        'database',
+        lambda: warm_up_database(
+            engine, settings.STARTUP_WARM_CONNECTIONS
+        ),
+    )
+    if read_engine is not engine:
+        await phase(
+            'read_database',
+            lambda: warm_up_database(
+                read_engine, settings.STARTUP_WARM_CONNECTIONS
+            ),
+        )
+    await phase('openapi', lambda: warm_up_openapi(app))
+    await phase('password_hash', warm_up_password_hash)
+
+    return phases
+
+
+async def refresh_replica_periodically(interval: float):
+    while True:
+        try:
+            started_at = time.monotonic()
+            await asyncio.to_thread(
+                refresh_sqlite_replica,
+                settings.DATABASE_URL,
+                settings.DATABASE_READ_URL,
+            )
+            mark_replica_synced(started_at)
+        except Exception:
+            logger.exception('sqlite replica refresh failed')
+        await asyncio.sleep(interval)
+
+
+async def compact_tombstones_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSession(engine) as session:
+                removed = await compact_tombstones(session)
+            logger.info('compacted %s todo tombstones', removed)
+        except Exception:
+            logger.exception('todo tombstone compaction failed')
+
+
+@asynccontextmanager
+async def lifespan(app):
+    start = perf_counter()
+    phases = (
+        await run_warm_up(app) if settings.STARTUP_WARM_UP else {}
+    )
+    total = perf_counter() - start
+
+    for name, seconds in phases.items():
+        STARTUP_DURATION.labels(name).set(seconds)
+    STARTUP_DURATION.labels('total').set(total)
+    logger.info(
+        'startup complete in %.1fms (%s)',
+        total * 1000,
+        ' '.join(
+            f'{name}={seconds * 1000:.1f}ms'
+            for name, seconds in phases.items()
+        ),
+    )
+
+    tasks = []
+    if settings.DATABASE_READ_URL and (
+        settings.SQLITE_REPLICA_REFRESH_SECONDS
+    ):
+        tasks.append(
+            refresh_replica_periodically(
+                settings.SQLITE_REPLICA_REFRESH_SECONDS
+            )
+        )
+    if settings.TODO_TOMBSTONE_COMPACT_SECONDS:
+        tasks.append(
+            compact_tombstones_periodically(
+                settings.TODO_TOMBSTONE_COMPACT_SECONDS
+            )
+        )
+    if event_broker.relay is not None:
+        tasks.append(
+            event_broker.relay.run(
+                event_broker, settings.TODO_EVENTS_RELAY_POLL_SECONDS
+            )
+        )
+    tasks = [asyncio.create_task(task) for task in tasks]
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+    # Espera o cancelamento antes de fechar os engines que elas usam
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await engine.dispose()
+    await read_engine.dispose()
+    password_hash_pool.shutdown()
+    mark_process_dead()
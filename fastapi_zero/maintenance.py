@@ -0,0 +1,114 @@
+import argparse
+import asyncio
+import logging
+from datetime import timedelta
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fastapi_zero.database import engine
+from fastapi_zero.models import Todo, TodoStateCount, TodoTombstone
+from fastapi_zero.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+
+async def tombstone_cutoff(session: AsyncSession):
+    # Relógio do banco, o mesmo que preenche deleted_at
+    now = await session.scalar(select(func.now()))
+    return now - timedelta(
+        days=settings.TODO_TOMBSTONE_RETENTION_DAYS
+    )
+
+
+async def compact_tombstones(session: AsyncSession) -> int:
+    result = await session.execute(
+        delete(TodoTombstone).where(
+            TodoTombstone.deleted_at < await tombstone_cutoff(session)
+        )
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def repair_todo_counts(session: AsyncSession) -> int:
+    expected = {
+        (user_id, state): count
+        for user_id, state, count in await session.execute(
+            select(Todo.user_id, Todo.state, func.count()).group_by(
+                Todo.user_id, Todo.state
+            )
+        )
+    }
+    stored = {
+        (user_id, state): count
+        for user_id, state, count in await session.execute(
+            select(
+                TodoStateCount.user_id,
+                TodoStateCount.state,
+                TodoStateCount.count,
+            )
+        )
+    }
+
+    drift = {
+        key: (stored.get(key, 0), expected.get(key, 0))
+        for key in expected.keys() | stored.keys()
+        if stored.get(key, 0) != expected.get(key, 0)
+    }
+    for (user_id, state), (found, count) in sorted(drift.items()):
+        logger.warning(
+            'todo count drift: user_id=%s state=%s '
+            'stored=%s actual=%s',
+            user_id,
+            state.value,
+            found,
+            count,
+        )
+
+    if drift:
+        await session.execute(delete(TodoStateCount))
+        if expected:
+            await session.execute(
+                insert(TodoStateCount),
+                [
+                    {
+                        'user_id': user_id,
+                        'state': state,
+                        'count': count,
+                    }
+                    for (user_id, state), count in expected.items()
+                ],
+            )
+        await session.commit()
+
+    return len(drift)
+
+
+async def run(command: str):
+    async with AsyncSession(engine) as session:
+        removed = await COMMANDS[command](session)
+    await engine.dispose()
+    logger.info('%s: %s rows', command, removed)
+
+
+COMMANDS = {
+    'compact-tombstones': compact_tombstones,
+    'repair-todo-counts': repair_todo_counts,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Tarefas de manutenção do banco'
+    )
+    parser.add_argument('command', choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.LOG_LEVEL)
+    asyncio.run(run(args.command))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+import os
+from time import perf_counter
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from fastapi_zero.cache import todo_list_cache, token_cache
+from fastapi_zero.database import engine
+
+REQUESTS = Counter(
+    'http_requests_total',
+    'Requisições HTTP atendidas',
+    ['method', 'route', 'status'],
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Latência das requisições HTTP',
+    ['method', 'route'],
+)
+IN_FLIGHT = Gauge(
+    'http_requests_in_flight',
+    'Requisições HTTP em andamento',
+    multiprocess_mode='livesum',
+)
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out',
+    'Conexões do pool em uso',
+    multiprocess_mode='livesum',
+)
+POOL_OVERFLOW = Gauge(
+    'db_pool_overflow',
+    'Conexões abertas além de pool_size',
+    multiprocess_mode='livesum',
+)
+PASSWORD_HASH_DURATION = Histogram(
+    'password_hash_duration_seconds',
+    'Duração das operações de hash de senha',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PASSWORD_HASH_REJECTED = Counter(
+    'password_hash_rejected_total',
+    'Operações de hash recusadas por fila cheia',
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    'password_hash_queue_depth',
+    'Operações de hash aguardando um worker livre',
+    multiprocess_mode='livesum',
+)
+CACHE_HITS = Counter(
+    'cache_hits',
+    'Acertos do cache',
+    ['cache'],
+)
+CACHE_MISSES = Counter(
+    'cache_misses',
+    'Falhas do cache',
+    ['cache'],
+)
+CACHE_EVICTIONS = Counter(
+    'cache_evictions',
+    'Entradas removidas pelo LRU por limite de tamanho',
+    ['cache'],
+)
+CACHE_ENTRIES = Gauge(
+    'cache_entries',
+    'Entradas atualmente no cache',
+    ['cache'],
+    multiprocess_mode='livesum',
+)
+STARTUP_DURATION = Gauge(
+    'app_startup_duration_seconds',
+    'Duração do startup por fase do warm-up',
+    ['phase'],
+    multiprocess_mode='liveall',
+)
+
+CACHES = {'token': token_cache, 'todo_list': todo_list_cache}
+CACHE_COUNTERS = {
+    'hit': CACHE_HITS,
+    'miss': CACHE_MISSES,
+    'eviction': CACHE_EVICTIONS,
+}
+
+
+def instrument_engine(async_engine):
+    pool = async_engine.sync_engine.pool
+
+    def update_overflow():
+        # Só QueuePool tem overflow; StaticPool e afins ficam em 0
+        if hasattr(pool, 'overflow'):
+            POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+    @event.listens_for(pool, 'checkout')
+    def on_checkout(*args):
+        POOL_CHECKED_OUT.inc()
+        update_overflow()
+
+    @event.listens_for(pool, 'checkin')
+    def on_checkin(*args):
+        POOL_CHECKED_OUT.dec()
+        update_overflow()
+
+
+instrument_engine(engine)
+
+
+def instrument_cache(name, cache):
+    counters = {
+        event: counter.labels(name)
+        for event, counter in CACHE_COUNTERS.items()
+    }
+    entries = CACHE_ENTRIES.labels(name)
+
+    def on_event(event):
+        if event == 'resize':
+            entries.set(len(cache))
+        else:
+            counters[event].inc()
+
+    cache.listener = on_event
+    entries.set(len(cache))
+
+
+for _name, _cache in CACHES.items():
+    instrument_cache(_name, _cache)
+
+
+def mark_process_dead():
+    # Remove os gauges live* deste worker dos arquivos agregados
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(os.getpid())
+
+
+def render_metrics() -> tuple[bytes, str]:
+    # Com vários workers cada processo grava em arquivos mmap no
+    # diretório e a coleta agrega todos eles
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            # Usa o template da rota para não explodir cardinalidade
+            route = scope.get('route')
+            path = route.path if route else 'unmatched'
+            REQUESTS.labels(scope['method'], path, status).inc()
+            REQUEST_DURATION.labels(scope['method'], path).observe(
+                perf_counter() - start
+            )
@@ -1,7 +1,15 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import (
+    DDL,
+    ForeignKey,
+    Index,
+    column,
+    event,
+    func,
+    table,
+)
 from sqlalchemy.orm import (
     Mapped,
     mapped_column,
@@ -11,6 +19,8 @@ from sqlalchemy.orm import (
 
 table_registry = registry()
 
+TIMESTAMP_MS = '%Y-%m-%d %H:%M:%f'
+
 
 class TodoState(str, Enum):
     draft = 'draft'
@@ -36,24 +46,187 @@ class User:
     )
 
     todos: Mapped[list['Todo']] = relationship(
-        init=False, cascade='all, delete-orphan', lazy='selectin'
+        init=False, cascade='all, delete-orphan', lazy='raise'
     )
 
 
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __table_args__ = (
+        Index('ix_todos_user_id_id', 'user_id', 'id'),
+        Index('ix_todos_user_id_state_id', 'user_id', 'state', 'id'),
+        Index('ix_todos_user_id_updated_at', 'user_id', 'updated_at'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
     description: Mapped[str]
     state: Mapped[TodoState]
 
+    # Milissegundos: duas escritas no mesmo segundo precisam de
+    # updated_at distintos para o ETag da listagem mudar
     created_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now()
+        init=False,
+        server_default=func.now(),
+        insert_default=func.strftime(TIMESTAMP_MS, 'now'),
     )
     updated_at: Mapped[datetime] = mapped_column(
-        init=False, server_default=func.now(), onupdate=func.now()
+        init=False,
+        server_default=func.now(),
+        insert_default=func.strftime(TIMESTAMP_MS, 'now'),
+        onupdate=func.strftime(TIMESTAMP_MS, 'now'),
     )
 
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+
+
+@table_registry.mapped_as_dataclass
+class TodoTombstone:
+    __tablename__ = 'todo_tombstones'
+    __table_args__ = (
+        Index(
+            'ix_todo_tombstones_user_id_deleted_at',
+            'user_id',
+            'deleted_at',
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    todo_id: Mapped[int]
+    user_id: Mapped[int]
+    deleted_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now()
+    )
+
+
+@table_registry.mapped_as_dataclass
+class TodoStateCount:
+    __tablename__ = 'todo_state_counts'
+
+    user_id: Mapped[int] = mapped_column(primary_key=True)
+    state: Mapped[TodoState] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+# Índice full-text (FTS5) de title/description, mantido por triggers
+todos_fts = table('todos_fts', column('rowid'))
+
+TODOS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+        title, description, content='todos', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todos_fts_ai AFTER INSERT ON todos
+    BEGIN
+        INSERT INTO todos_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todos_fts_ad AFTER DELETE ON todos
+    BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todos_fts_au
+    AFTER UPDATE OF title, description ON todos
+    BEGIN
+        INSERT INTO todos_fts (todos_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO todos_fts (rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+)
+
+for _statement in TODOS_FTS_DDL:
+    event.listen(
+        Todo.__table__,
+        'after_create',
+        DDL(_statement).execute_if(dialect='sqlite'),
+    )
+
+event.listen(
+    Todo.__table__,
+    'after_drop',
+    DDL('DROP TABLE IF EXISTS todos_fts').execute_if(
+        dialect='sqlite'
+    ),
+)
+
+# Toda remoção de todo (unitária, em lote ou em cascata) deixa uma
+# lápide para o sync incremental. Criado depois de todas as tabelas.
+# Sem AUTOINCREMENT o SQLite reusa o maior id apagado: o todo novo
+# com o mesmo id do mesmo usuário apaga a lápide antiga, senão o
+# cliente receberia o id em todos e em deleted ao mesmo tempo.
+TODO_TOMBSTONE_DDL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS todos_tombstone_ad
+    AFTER DELETE ON todos
+    BEGIN
+        INSERT INTO todo_tombstones (todo_id, user_id)
+        VALUES (old.id, old.user_id);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todos_tombstone_ai
+    AFTER INSERT ON todos
+    BEGIN
+        DELETE FROM todo_tombstones
+        WHERE user_id = new.user_id AND todo_id = new.id;
+    END
+    """,
+)
+
+for _statement in TODO_TOMBSTONE_DDL:
+    event.listen(
+        table_registry.metadata,
+        'after_create',
+        DDL(_statement).execute_if(dialect='sqlite'),
+    )
+
+# Contadores por (user_id, state) mantidos na mesma transação da
+# escrita; maintenance repair-todo-counts corrige eventuais desvios
+TODO_STATE_COUNT_DDL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_state_counts_ai
+    AFTER INSERT ON todos
+    BEGIN
+        INSERT INTO todo_state_counts (user_id, state, count)
+        VALUES (new.user_id, new.state, 1)
+        ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_state_counts_ad
+    AFTER DELETE ON todos
+    BEGIN
+        UPDATE todo_state_counts SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_state_counts_au
+    AFTER UPDATE OF state, user_id ON todos
+    WHEN old.state IS NOT new.state OR old.user_id IS NOT new.user_id
+    BEGIN
+        UPDATE todo_state_counts SET count = count - 1
+        WHERE user_id = old.user_id AND state = old.state;
+        INSERT INTO todo_state_counts (user_id, state, count)
+        VALUES (new.user_id, new.state, 1)
+        ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+    END
+    """,
+)
+
+for _statement in TODO_STATE_COUNT_DDL:
+    event.listen(
+        table_registry.metadata,
+        'after_create',
+        DDL(_statement).execute_if(dialect='sqlite'),
+    )
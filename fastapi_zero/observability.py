@@ -0,0 +1,252 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from fastapi_zero.cache import LRUCache
+from fastapi_zero.settings import Settings
+
+logger = logging.getLogger(__name__)
+settings = Settings()
+
+
+class RequestTimings:
+    __slots__ = ('phases', 'queries')
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        metrics = [
+            f'{phase};dur={seconds * 1000:.2f}'
+            for phase, seconds in self.phases.items()
+            if phase != 'db'
+        ]
+        metrics.append(
+            f'db;dur={self.phases.get("db", 0.0) * 1000:.2f}'
+            f';desc="{self.queries} queries"'
+        )
+        metrics.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(metrics)
+
+
+# Só existe durante requisições amostradas; fora delas tudo é no-op
+current_timings: ContextVar[RequestTimings | None] = ContextVar(
+    'current_timings', default=None
+)
+
+
+# Escopo ASGI da requisição corrente, para saber a rota de origem
+current_scope: ContextVar[dict | None] = ContextVar(
+    'current_scope', default=None
+)
+
+
+def record(phase: str, seconds: float):
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def timed(phase: str):
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, perf_counter() - start)
+
+
+@event.listens_for(Engine, 'before_cursor_execute', named=True)
+def _before_cursor_execute(context, **kw):
+    context._query_start = perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute', named=True)
+def _after_cursor_execute(context, **kw):
+    start = getattr(context, '_query_start', None)
+    if start is None:
+        return
+
+    elapsed = perf_counter() - start
+    timings = current_timings.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.add('db', elapsed)
+
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold is not None and elapsed * 1000 >= threshold:
+        log_slow_query(elapsed=elapsed, **kw)
+
+
+class SlowQueryShape:
+    __slots__ = ('plan', 'last_logged', 'suppressed')
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.last_logged = None
+        self.suppressed = 0
+
+
+# Uma entrada por formato de statement: guarda o plano e o
+# rate limit, então EXPLAIN roda uma vez por formato
+slow_query_shapes = LRUCache(
+    max_entries=settings.SLOW_QUERY_MAX_SHAPES
+)
+
+
+def parameter_shape(parameters, executemany):
+    if executemany:
+        rows = list(parameters or ())
+        return {
+            'rows': len(rows),
+            'row': parameter_shape(rows[0], False) if rows else None,
+        }
+    if isinstance(parameters, dict):
+        return {
+            key: type(value).__name__
+            for key, value in parameters.items()
+        }
+    return [type(value).__name__ for value in parameters or ()]
+
+
+def explain_query_plan(conn, statement, parameters, executemany):
+    if conn.dialect.name != 'sqlite':
+        return None
+
+    if executemany:
+        parameters = next(iter(parameters or ()), ())
+
+    # Cursor novo: o cursor original ainda tem resultados pendentes
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(
+            f'EXPLAIN QUERY PLAN {statement}', parameters or ()
+        )
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'unavailable: {error}']
+    finally:
+        cursor.close()
+
+
+def request_route():
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get('route')
+    return route.path if route else scope.get('path')
+
+
+def log_slow_query(
+    conn, statement, parameters, executemany, elapsed, **kw
+):
+    key = hashlib.blake2b(
+        statement.encode(), digest_size=16
+    ).hexdigest()
+    shape = slow_query_shapes.get(key)
+    if shape is None:
+        shape = SlowQueryShape(
+            explain_query_plan(
+                conn, statement, parameters, executemany
+            )
+        )
+        slow_query_shapes.set(key, shape)
+
+    now = time.monotonic()
+    if (
+        shape.last_logged is not None
+        and now - shape.last_logged < settings.SLOW_QUERY_LOG_INTERVAL
+    ):
+        shape.suppressed += 1
+        return
+
+    logger.warning(
+        json.dumps({
+            'event': 'slow_query',
+            'shape': key,
+            'duration_ms': round(elapsed * 1000, 2),
+            'route': request_route(),
+            'statement': statement,
+            'parameters': parameter_shape(parameters, executemany),
+            'plan': shape.plan,
+            'suppressed': shape.suppressed,
+        })
+    )
+    shape.last_logged = now
+    shape.suppressed = 0
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        scope_token = current_scope.set(scope)
+        try:
+            if random.random() < settings.SERVER_TIMING_SAMPLE_RATE:
+                await self.timed_call(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            current_scope.reset(scope_token)
+
+    async def timed_call(self, scope, receive, send):
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    'Server-Timing',
+                    timings.server_timing(perf_counter() - start),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            logger.info(
+                json.dumps({
+                    'event': 'request_timing',
+                    'method': scope['method'],
+                    'path': scope['path'],
+                    'status': status,
+                    'total_ms': round(
+                        (perf_counter() - start) * 1000, 2
+                    ),
+                    'queries': timings.queries,
+                    'phases_ms': {
+                        phase: round(seconds * 1000, 2)
+                        for phase, seconds in timings.phases.items()
+                    },
+                })
+            )
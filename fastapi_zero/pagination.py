@@ -0,0 +1,31 @@
+import base64
+import json
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+
+def encode_cursor(last_id: int) -> str:
+    payload = json.dumps({'id': last_id}, separators=(',', ':'))
+    encoded = base64.urlsafe_b64encode(payload.encode())
+    return encoded.decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    padding = '=' * (-len(cursor) % 4)
+    try:
+        payload = json.loads(
+            base64.urlsafe_b64decode(cursor + padding)
+        )
+        return int(payload['id'])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Invalid cursor',
+        )
+
+
+def next_cursor(rows, limit: int) -> str | None:
+    if limit and len(rows) == limit:
+        return encode_cursor(rows[-1].id)
+    return None
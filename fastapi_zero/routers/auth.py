@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,28 +9,37 @@ from fastapi_zero.database import get_session
 from fastapi_zero.models import User
 from fastapi_zero.schemas import Token
 from fastapi_zero.security import (
+    Principal,
     create_access_token,
     get_current_user,
-    verify_password,
+    verify_password_async,
 )
+from fastapi_zero.throttling import check_login_throttle
 
 router = APIRouter(prefix=('/auth'), tags=['auth'])
 
 T_Session = Annotated[AsyncSession, Depends(get_session)]
 T_OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post('/token', response_model=Token)
 async def login_for_access_token(
+    request: Request,
     session: T_Session,
     form_data: T_OAuth2Form,
 ):
+    # Antes de qualquer consulta ou hash: rajadas não gastam argon2
+    await check_login_throttle(
+        request.client.host if request.client else None,
+        form_data.username,
+    )
+
     user = await session.scalar(
         select(User).where(User.email == form_data.username)
     )
 
-    if not user or not verify_password(
+    if not user or not await verify_password_async(
         form_data.password, user.password
     ):
         raise HTTPException(
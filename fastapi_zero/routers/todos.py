@@ -1,27 +1,268 @@
 # pylama: ignore=PLR0913,PLR0917
+import asyncio
+import csv
+import io
+import json
+from datetime import UTC, datetime, timedelta
+from enum import Enum
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    String,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    update,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from fastapi_zero.cache import (
+    invalidate_user,
+    todo_list_cache,
+    user_generation,
+)
+from fastapi_zero.conditional import (
+    etag_matches,
+    not_modified,
+    weak_etag,
+)
 from fastapi_zero.database import get_session
-from fastapi_zero.models import Todo, User
+from fastapi_zero.events import DROPPED, event_broker
+from fastapi_zero.models import (
+    Todo,
+    TodoState,
+    TodoStateCount,
+    TodoTombstone,
+    todos_fts,
+)
+from fastapi_zero.observability import timed
+from fastapi_zero.pagination import decode_cursor, next_cursor
 from fastapi_zero.schemas import (
     FilterTodo,
+    FilterTodoBase,
+    FilterTodoExport,
     Message,
+    TodoBulkCreate,
+    TodoBulkDelete,
+    TodoBulkResult,
+    TodoBulkUpdate,
+    TodoChanges,
+    TodoFilterResult,
     TodoList,
+    TodoListRows,
     TodoPublic,
+    TodoRow,
     TodoSchema,
+    TodoSummary,
     TodoUpdate,
 )
-from fastapi_zero.security import get_current_user
+from fastapi_zero.security import (
+    Principal,
+    get_current_user,
+    get_user_read_session,
+)
+from fastapi_zero.settings import Settings
 
 router = APIRouter(prefix='/todos', tags=['todos'])
+settings = Settings()
 
 T_Session = Annotated[AsyncSession, Depends(get_session)]
-T_User = Annotated[User, Depends(get_current_user)]
+T_ReadSession = Annotated[
+    AsyncSession, Depends(get_user_read_session)
+]
+T_User = Annotated[Principal, Depends(get_current_user)]
+
+TODO_FIELDS = tuple(TodoRow.__annotations__)
+TODO_COLUMNS = tuple(getattr(Todo, field) for field in TODO_FIELDS)
+EXPORT_COLUMNS = (
+    Todo.id,
+    Todo.title,
+    Todo.description,
+    Todo.state,
+    Todo.created_at,
+    Todo.updated_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+todo_row_adapter = TypeAdapter(TodoRow)
+todo_list_adapter = TypeAdapter(TodoListRows)
+
+
+def todo_row(todo) -> TodoRow:
+    # Aceita tanto Row de colunas quanto instância de Todo
+    return {field: getattr(todo, field) for field in TODO_FIELDS}
+
+
+def todo_response(row):
+    # Caminho rápido: serializa a linha direto, sem passar pela
+    # validação do response_model (o OpenAPI continua o mesmo)
+    if settings.FAST_JSON_RESPONSES:
+        return Response(
+            todo_row_adapter.dump_json(todo_row(row)),
+            media_type='application/json',
+        )
+    return row
+
+
+def publish_todos(user_id: int, event_type: str, todos):
+    # Só depois do commit: assinante nunca vê escrita desfeita
+    for todo in todos:
+        event_broker.publish(
+            user_id,
+            {
+                'type': event_type,
+                'todo': {'id': todo}
+                if event_type == 'deleted'
+                else todo_row_adapter.dump_python(
+                    todo_row(todo), mode='json'
+                ),
+            },
+        )
+
+
+def dump_todo_list(todos, cursor: str | None) -> bytes:
+    if settings.FAST_JSON_RESPONSES:
+        return todo_list_adapter.dump_json({
+            'todos': [todo_row(row) for row in todos],
+            'next_cursor': cursor,
+        })
+
+    page = TodoList.model_validate(
+        {'todos': todos, 'next_cursor': cursor}, from_attributes=True
+    )
+    return page.model_dump_json().encode()
+
+
+def fts_match(search: str):
+    # Cada termo vira uma frase entre aspas (escapa a sintaxe FTS5)
+    terms = ' '.join(
+        '"{}"'.format(term.replace('"', '""'))
+        for term in search.split()
+    )
+    return literal_column('todos_fts').op('MATCH')(terms)
+
+
+def todo_predicates(todo_filter: FilterTodoBase):
+    # Só os critérios que de fato restringem (string vazia não conta)
+    predicates = []
+    if todo_filter.search:
+        predicates.append(fts_match(todo_filter.search))
+
+    if todo_filter.title:
+        predicates.append(Todo.title.contains(todo_filter.title))
+
+    if todo_filter.description:
+        predicates.append(
+            Todo.description.contains(todo_filter.description)
+        )
+
+    if todo_filter.state:
+        predicates.append(Todo.state == todo_filter.state)
+
+    return predicates
+
+
+def filter_todos(query, todo_filter: FilterTodoBase):
+    if todo_filter.search:
+        query = query.join(todos_fts, todos_fts.c.rowid == Todo.id)
+
+    return query.where(*todo_predicates(todo_filter))
+
+
+def select_todos(user_id: int, todo_filter: FilterTodo, *columns):
+    query = filter_todos(
+        select(*columns or (Todo,)).where(Todo.user_id == user_id),
+        todo_filter,
+    )
+
+    if todo_filter.search:
+        query = query.order_by(func.bm25(literal_column('todos_fts')))
+
+    if todo_filter.cursor and not todo_filter.search:
+        query = query.where(
+            Todo.id > decode_cursor(todo_filter.cursor)
+        )
+    else:
+        query = query.offset(todo_filter.offset)
+
+    return query.order_by(Todo.id).limit(todo_filter.limit)
+
+
+def select_todo(user_id: int, todo_id: int, *columns):
+    return select(*columns or (Todo,)).where(
+        Todo.user_id == user_id, Todo.id == todo_id
+    )
+
+
+def select_todo_version(user_id: int, todo_filter: FilterTodoBase):
+    # ETag vem de count + max(updated_at), sem carregar linhas
+    return filter_todos(
+        select(func.count(Todo.id), func.max(Todo.updated_at)).where(
+            Todo.user_id == user_id
+        ),
+        todo_filter,
+    )
+
+
+def select_export(user_id: int, todo_filter: FilterTodoBase):
+    return filter_todos(
+        select(*EXPORT_COLUMNS).where(Todo.user_id == user_id),
+        todo_filter,
+    ).order_by(Todo.id)
+
+
+def since_key(since: datetime):
+    # Os timestamps são texto no SQLite e variam de formato
+    # ('...SS', '...SS.fff'): compara com o segundo truncado, que é
+    # prefixo de todos eles, sem envolver a coluna em função (o
+    # índice continua usável)
+    return literal(since.strftime('%Y-%m-%d %H:%M:%S'), String)
+
+
+def select_changes(user_id: int, since: datetime | None = None):
+    query = select(*TODO_COLUMNS).where(Todo.user_id == user_id)
+    if since is not None:
+        query = query.where(Todo.updated_at >= since_key(since))
+    return query.order_by(Todo.updated_at, Todo.id)
+
+
+def select_deleted(user_id: int, since: datetime):
+    return (
+        select(TodoTombstone.todo_id)
+        .where(
+            TodoTombstone.user_id == user_id,
+            TodoTombstone.deleted_at >= since_key(since),
+        )
+        .order_by(TodoTombstone.deleted_at)
+    )
+
+
+def select_filtered_ids(
+    user_id: int, todo_filter: FilterTodoBase, after: int
+):
+    return (
+        filter_todos(
+            select(Todo.id).where(
+                Todo.user_id == user_id, Todo.id > after
+            ),
+            todo_filter,
+        )
+        .order_by(Todo.id)
+        .limit(settings.TODO_FILTER_BATCH_SIZE)
+    )
 
 
 @router.post('/', response_model=TodoPublic)
@@ -37,77 +278,502 @@ async def create_todo(
         user_id=user.id,
     )
     session.add(db_todo)
+    # INSERT ... RETURNING já traz id, created_at e updated_at
     await session.commit()
-    await session.refresh(db_todo)
+    invalidate_user(user.id)
+    publish_todos(user.id, 'created', [db_todo])
 
-    return db_todo
+    return todo_response(db_todo)
 
 
 @router.get('/', response_model=TodoList)
 async def list_todos(
     user: T_User,
-    session: T_Session,
+    session: T_ReadSession,
     todo_filter: Annotated[FilterTodo, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    query = select(Todo).where(Todo.user_id == user.id)
+    # A chave é calculada antes da leitura: uma escrita concorrente
+    # muda a geração e a resposta antiga fica inalcançável.
+    cache_key = (
+        user.id,
+        user_generation(user.id),
+        todo_filter.model_dump_json(),
+    )
+    cached = todo_list_cache.get(cache_key)
 
-    if todo_filter.title:
-        query = query.filter(Todo.title.contains(todo_filter.title))
+    if cached is None:
+        version = await session.execute(
+            select_todo_version(user.id, todo_filter)
+        )
+        etag = weak_etag(user.id, cache_key[2], *version.one())
 
-    if todo_filter.description:
-        query = query.filter(
-            Todo.description.contains(todo_filter.description)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        todos = (
+            await session.execute(
+                select_todos(user.id, todo_filter, *TODO_COLUMNS)
+            )
+        ).all()
+        with timed('serialize'):
+            body = dump_todo_list(
+                todos,
+                # Busca por relevância pagina só por offset
+                None
+                if todo_filter.search
+                else next_cursor(todos, todo_filter.limit),
+            )
+        cached = (etag, body)
+        todo_list_cache.set(cache_key, cached, size=len(body))
+
+    etag, body = cached
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    return Response(
+        body, media_type='application/json', headers={'ETag': etag}
+    )
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def export_ndjson(rows, header: bool):
+    return ''.join(
+        json.dumps({
+            field: export_value(value)
+            for field, value in zip(EXPORT_FIELDS, row)
+        })
+        + '\n'
+        for row in rows
+    )
+
+
+def export_csv(rows, header: bool):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(
+        [export_value(value) for value in row] for row in rows
+    )
+    return buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv'),
+}
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_todos(
+    user: T_User,
+    session: T_ReadSession,
+    todo_filter: Annotated[FilterTodoExport, Query()],
+):
+    query = select_export(user.id, todo_filter)
+    encode, media_type = EXPORT_FORMATS[todo_filter.format]
+
+    # A sessão da dependência é fechada antes do corpo ser enviado,
+    # então o stream abre a sua própria sessão no mesmo engine.
+    engine = session.bind
+
+    async def stream():
+        async with AsyncSession(engine) as export_session:
+            result = await export_session.stream(
+                query.execution_options(
+                    yield_per=settings.TODO_EXPORT_CHUNK_SIZE
+                )
+            )
+            header = True
+            async for rows in result.partitions():
+                yield encode(rows, header)
+                header = False
+
+            if header:
+                yield encode([], header)
+
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename=todos.{todo_filter.format}'
+            )
+        },
+    )
+
+
+@router.get('/summary', response_model=TodoSummary)
+async def summarize_todos(user: T_User, session: T_ReadSession):
+    # Lê a tabela de contadores: no máximo uma linha por estado
+    counts = dict.fromkeys(TodoState, 0)
+    counts.update(
+        (
+            await session.execute(
+                select(
+                    TodoStateCount.state, TodoStateCount.count
+                ).where(TodoStateCount.user_id == user.id)
+            )
+        ).all()
+    )
+
+    return {'counts': counts, 'total': sum(counts.values())}
+
+
+@router.get('/events', response_class=StreamingResponse)
+async def stream_todo_events(user: T_User):
+    subscription = event_broker.subscribe(user.id)
+
+    async def stream():
+        try:
+            yield ': connected\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        settings.TODO_EVENTS_KEEPALIVE_SECONDS,
+                    )
+                except TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+
+                if event is DROPPED:
+                    # Ficou para trás: o cliente refaz por /changes
+                    yield 'event: dropped\ndata: {}\n\n'
+                    return
+
+                yield (
+                    f'event: {event["type"]}\n'
+                    f'data: {json.dumps(event["todo"])}\n\n'
+                )
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+        },
+    )
+
+
+@router.get('/changes', response_model=TodoChanges)
+async def list_todo_changes(
+    user: T_User,
+    session: T_Session,
+    since: datetime | None = None,
+):
+    # Sempre no primário: um watermark tirado da réplica pularia de
+    # vez as linhas que ainda não chegaram nela
+    now = await session.scalar(select(func.now()))
+    deleted = []
+
+    if since is not None:
+        # O banco guarda UTC sem fuso
+        if since.tzinfo is not None:
+            since = since.astimezone(UTC).replace(tzinfo=None)
+
+        retention = timedelta(
+            days=settings.TODO_TOMBSTONE_RETENTION_DAYS
         )
+        if since < now - retention:
+            raise HTTPException(
+                status_code=HTTPStatus.GONE,
+                detail='Watermark too old, full resync required',
+            )
 
-    if todo_filter.state:
-        query = query.filter(Todo.state == todo_filter.state)
+        deleted = (
+            await session.scalars(select_deleted(user.id, since))
+        ).all()
+
+    todos = (
+        await session.execute(select_changes(user.id, since))
+    ).all()
+
+    # O corte de since é por segundo e escritas em curso podem
+    # comitar depois da leitura: o watermark recua e o cliente recebe
+    # duplicatas (idempotentes) em vez de perder mudanças
+    watermark = now - timedelta(
+        seconds=settings.TODO_CHANGES_SAFETY_SECONDS
+    )
+    return {
+        'todos': todos,
+        'deleted': deleted,
+        'watermark': watermark,
+    }
+
+
+def check_bulk_size(items: list):
+    max_items = settings.TODO_BULK_MAX_ITEMS
+    if len(items) > max_items:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail=f'Batch too large (max {max_items})',
+        )
+
+
+@router.post('/bulk', response_model=TodoBulkResult)
+async def create_todos_bulk(
+    payload: TodoBulkCreate, session: T_Session, user: T_User
+):
+    check_bulk_size(payload.todos)
+
+    db_todos = await session.scalars(
+        insert(Todo).returning(Todo),
+        [
+            {**todo.model_dump(), 'user_id': user.id}
+            for todo in payload.todos
+        ],
+    )
+    # Um único INSERT multi-VALUES gera os ids na ordem da entrada
+    results = [
+        {
+            'id': db_todo.id,
+            'status': HTTPStatus.CREATED,
+            'todo': db_todo,
+        }
+        for db_todo in sorted(db_todos.all(), key=lambda t: t.id)
+    ]
+    await session.commit()
+    invalidate_user(user.id)
+    publish_todos(
+        user.id, 'created', [result['todo'] for result in results]
+    )
+
+    return {'results': results}
+
+
+@router.patch('/bulk', response_model=TodoBulkResult)
+async def patch_todos_bulk(
+    payload: TodoBulkUpdate, session: T_Session, user: T_User
+):
+    check_bulk_size(payload.todos)
 
-    todos = await session.scalars(
-        query.limit(todo_filter.limit).offset(todo_filter.offset)
+    ids = {todo.id for todo in payload.todos}
+    owned = set(
+        await session.scalars(
+            select(Todo.id).where(
+                Todo.user_id == user.id, Todo.id.in_(ids)
+            )
+        )
+    )
+
+    changes = [
+        {'id': todo.id, **todo.model_dump(exclude_unset=True)}
+        for todo in payload.todos
+        if todo.id in owned and todo.model_fields_set - {'id'}
+    ]
+    if changes:
+        # UPDATE em lote pela chave primária (executemany)
+        await session.execute(update(Todo), changes)
+
+    db_todos = {
+        db_todo.id: db_todo
+        for db_todo in await session.scalars(
+            select(Todo)
+            .where(Todo.id.in_(owned))
+            .execution_options(populate_existing=True)
+        )
+    }
+    await session.commit()
+    invalidate_user(user.id)
+    publish_todos(
+        user.id,
+        'updated',
+        [db_todos[change['id']] for change in changes],
+    )
+
+    return {
+        'results': [
+            {
+                'id': todo.id,
+                'status': HTTPStatus.OK,
+                'todo': db_todos[todo.id],
+            }
+            if todo.id in owned
+            else {
+                'id': todo.id,
+                'status': HTTPStatus.NOT_FOUND,
+                'detail': 'Task not found.',
+            }
+            for todo in payload.todos
+        ]
+    }
+
+
+@router.delete('/bulk', response_model=TodoBulkResult)
+async def delete_todos_bulk(
+    payload: TodoBulkDelete, session: T_Session, user: T_User
+):
+    check_bulk_size(payload.ids)
+
+    deleted = set(
+        await session.scalars(
+            delete(Todo)
+            .where(Todo.user_id == user.id, Todo.id.in_(payload.ids))
+            .returning(Todo.id)
+        )
     )
+    await session.commit()
+    invalidate_user(user.id)
+    publish_todos(user.id, 'deleted', sorted(deleted))
+
+    return {
+        'results': [
+            {'id': todo_id, 'status': HTTPStatus.OK}
+            if todo_id in deleted
+            else {
+                'id': todo_id,
+                'status': HTTPStatus.NOT_FOUND,
+                'detail': 'Task not found.',
+            }
+            for todo_id in payload.ids
+        ]
+    }
+
+
+def check_filter(todo_filter: FilterTodoBase):
+    # Sem nenhum filtro a operação pegaria todos os todos do usuário
+    if not todo_predicates(todo_filter):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='At least one filter is required',
+        )
+
+
+async def apply_by_filter(
+    session, user_id: int, todo_filter: FilterTodoBase, statement
+):
+    last_id = 0
 
-    return {'todos': todos.all()}
+    while True:
+        # Keyset por id: cada lote é um UPDATE/DELETE ... RETURNING
+        # com commit próprio, então a trava de escrita do SQLite
+        # fica presa só durante um lote
+        batch = select_filtered_ids(user_id, todo_filter, last_id)
+        rows = (
+            await session.execute(statement.where(Todo.id.in_(batch)))
+        ).all()
+        if not rows:
+            break
+
+        await session.commit()
+        invalidate_user(user_id)
+        yield rows
+
+        last_id = max(row.id for row in rows)
+        if len(rows) < settings.TODO_FILTER_BATCH_SIZE:
+            break
+
+
+@router.patch('/', response_model=TodoFilterResult)
+async def patch_todos_by_filter(
+    session: T_Session,
+    user: T_User,
+    todo_filter: Annotated[FilterTodoBase, Query()],
+    todo: TodoUpdate,
+):
+    check_filter(todo_filter)
+    values = todo.model_dump(exclude_unset=True)
+    if not values:
+        return {'affected': 0}
+
+    affected = 0
+    async for rows in apply_by_filter(
+        session,
+        user.id,
+        todo_filter,
+        update(Todo)
+        .where(Todo.user_id == user.id)
+        .values(**values)
+        .returning(*TODO_COLUMNS),
+    ):
+        publish_todos(user.id, 'updated', rows)
+        affected += len(rows)
+
+    return {'affected': affected}
+
+
+@router.delete('/', response_model=TodoFilterResult)
+async def delete_todos_by_filter(
+    session: T_Session,
+    user: T_User,
+    todo_filter: Annotated[FilterTodoBase, Query()],
+):
+    check_filter(todo_filter)
+
+    affected = 0
+    async for rows in apply_by_filter(
+        session,
+        user.id,
+        todo_filter,
+        delete(Todo)
+        .where(Todo.user_id == user.id)
+        .returning(Todo.id),
+    ):
+        publish_todos(user.id, 'deleted', [row.id for row in rows])
+        affected += len(rows)
+
+    return {'affected': affected}
 
 
 @router.patch('/{todo_id}', response_model=TodoPublic)
 async def patch_todo(
     todo_id: int, session: T_Session, user: T_User, todo: TodoUpdate
 ):
-    db_todo = await session.scalar(
-        select(Todo).where(
-            Todo.user_id == user.id, Todo.id == todo_id
+    values = todo.model_dump(exclude_unset=True)
+
+    if values:
+        query = (
+            update(Todo)
+            .where(Todo.user_id == user.id, Todo.id == todo_id)
+            .values(**values)
+            .returning(*TODO_COLUMNS)
         )
-    )
+    else:
+        query = select_todo(user.id, todo_id, *TODO_COLUMNS)
+
+    db_todo = (await session.execute(query)).first()
 
     if not db_todo:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Task not found.'
         )
 
-    for key, value in todo.model_dump(exclude_unset=True).items():
-        setattr(db_todo, key, value)
-
-    session.add(db_todo)
     await session.commit()
-    await session.refresh(db_todo)
+    invalidate_user(user.id)
+    if values:
+        publish_todos(user.id, 'updated', [db_todo])
 
-    return db_todo
+    return todo_response(db_todo)
 
 
 @router.delete('/{todo_id}', response_model=Message)
 async def delete_todo(todo_id: int, session: T_Session, user: T_User):
-    todo = await session.scalar(
-        select(Todo).where(
-            Todo.user_id == user.id, Todo.id == todo_id
-        )
+    deleted = await session.scalar(
+        delete(Todo)
+        .where(Todo.user_id == user.id, Todo.id == todo_id)
+        .returning(Todo.id)
     )
 
-    if not todo:
+    if not deleted:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Task not found.'
         )
 
-    await session.delete(todo)
     await session.commit()
+    invalidate_user(user.id)
+    publish_todos(user.id, 'deleted', [deleted])
 
     return {'message': 'Task has been deleted successfully.'}
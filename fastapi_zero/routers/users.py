@@ -1,35 +1,81 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Response,
+)
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi_zero.database import get_session
+from fastapi_zero.cache import invalidate_user
+from fastapi_zero.conditional import (
+    etag_matches,
+    not_modified,
+    weak_etag,
+)
+from fastapi_zero.database import get_read_session, get_session
 from fastapi_zero.models import User
+from fastapi_zero.pagination import decode_cursor, next_cursor
 from fastapi_zero.schemas import (
     Message,
     UserList,
     UserPublic,
     UserSchema,
 )
-from fastapi_zero.security import get_current_user, get_password_hash
+from fastapi_zero.security import (
+    Principal,
+    get_current_user,
+    get_password_hash_async,
+    get_user_read_session,
+)
 
 router = APIRouter(prefix='/users', tags=['users'])
 T_Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+T_ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+T_UserReadSession = Annotated[
+    AsyncSession, Depends(get_user_read_session)
+]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+
+
+def conflict_exception(error: IntegrityError):
+    message = str(error.orig)
+
+    if 'users.username' in message:
+        detail = 'Username ja existe'
+    elif 'users.email' in message:
+        detail = 'Email ja existe'
+    else:
+        raise error
+
+    return HTTPException(
+        detail=detail, status_code=HTTPStatus.CONFLICT
+    )
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=UserList)
 async def read_users(
-    session: T_Session,
+    session: T_ReadSession,
     limit: int = 10,
     offset: int = 0,
+    cursor: str | None = None,
 ):
-    users = await session.scalars(
-        select(User).limit(limit).offset(offset)
-    )
-    return {'users': users}
+    query = select(User)
+
+    if cursor:
+        query = query.where(User.id > decode_cursor(cursor))
+    else:
+        query = query.offset(offset)
+
+    users = (
+        await session.scalars(query.order_by(User.id).limit(limit))
+    ).all()
+    return {'users': users, 'next_cursor': next_cursor(users, limit)}
 
 
 @router.put(
@@ -48,14 +94,28 @@ async def update_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Sem permissão'
         )
 
-    current_user.email = user.email
-    current_user.username = user.username
-    current_user.password = get_password_hash(user.password)
+    password = await get_password_hash_async(user.password)
 
-    await session.commit()
-    await session.refresh(current_user)
+    try:
+        db_user = await session.scalar(
+            update(User)
+            .where(User.id == user_id)
+            .values(
+                email=user.email,
+                username=user.username,
+                password=password,
+            )
+            .returning(User)
+        )
+        await session.commit()
+    except IntegrityError as error:
+        await session.rollback()
+        raise conflict_exception(error)
 
-    return current_user
+    # Leituras seguintes vão ao primário até a réplica alcançar
+    invalidate_user(user_id)
+
+    return db_user
 
 
 @router.delete(
@@ -73,8 +133,11 @@ async def delete_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Sem permissão'
         )
 
-    await session.delete(current_user)
+    db_user = await session.get(User, user_id)
+
+    await session.delete(db_user)
     await session.commit()
+    invalidate_user(user_id)
 
     return {'message': 'user delete'}
 
@@ -85,35 +148,22 @@ async def delete_user(
     response_model=UserPublic,
 )
 async def create_user(user: UserSchema, session: T_Session):
-    db_user = await session.scalar(
-        select(User).where(
-            (User.username == user.username)
-            | (User.email == user.email)
-        )
-    )
-
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(
-                detail='Username ja existe',
-                status_code=HTTPStatus.CONFLICT,
-            )
-
-        elif db_user.email == user.email:
-            raise HTTPException(
-                detail='Email ja existe',
-                status_code=HTTPStatus.CONFLICT,
-            )
-
     db_user = User(
         username=user.username,
         email=user.email,
-        password=get_password_hash(user.password),
+        password=await get_password_hash_async(user.password),
     )
 
+    # Duplicidade é detectada pelas constraints UNIQUE do INSERT
     session.add(db_user)
-    await session.commit()
-    await session.refresh(db_user)
+    try:
+        await session.commit()
+    except IntegrityError as error:
+        await session.rollback()
+        raise conflict_exception(error)
+
+    # A réplica ainda não tem o usuário recém-criado
+    invalidate_user(db_user.id)
 
     return db_user
 
@@ -125,8 +175,10 @@ async def create_user(user: UserSchema, session: T_Session):
 )
 async def read_user_by_id(
     user_id: int,
-    session: T_Session,
+    session: T_UserReadSession,
     current_user: CurrentUser,  # Adiciona autenticação
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
     if current_user.id != user_id:
         raise HTTPException(
@@ -141,4 +193,15 @@ async def read_user_by_id(
             detail='Não encontrado', status_code=HTTPStatus.NOT_FOUND
         )
 
+    etag = weak_etag(
+        user_db.id,
+        user_db.username,
+        user_db.email,
+        user_db.updated_at,
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    response.headers['ETag'] = etag
+
     return user_db
@@ -1,6 +1,8 @@
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing_extensions import TypedDict
 
 from fastapi_zero.models import TodoState
 
@@ -29,6 +31,7 @@ class UserDB(UserSchema):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class Token(BaseModel):
@@ -41,12 +44,21 @@ class FilterPage(BaseModel):
     limit: int = Field(ge=0, default=0)
 
 
-class FilterTodo(BaseModel):
+class FilterTodoBase(BaseModel):
     title: str | None = Field(default=None, min_length=3)
-    description: str | None = None
+    description: str | None = Field(default=None, min_length=1)
+    search: str | None = Field(default=None, pattern=r'\S')
     state: TodoState | None = None
+
+
+class FilterTodo(FilterTodoBase):
     limit: int = Field(default=10, ge=1, le=100)
     offset: int = Field(default=0, ge=0)
+    cursor: str | None = None
+
+
+class FilterTodoExport(FilterTodoBase):
+    format: Literal['ndjson', 'csv'] = 'ndjson'
 
 
 class TodoSchema(BaseModel):
@@ -63,9 +75,68 @@ class TodoPublic(TodoSchema):
 
 class TodoList(BaseModel):
     todos: list[TodoPublic]
+    next_cursor: str | None = None
+
+
+class TodoChanges(BaseModel):
+    todos: list[TodoPublic]
+    deleted: list[int]
+    watermark: datetime
+
+
+class TodoSummary(BaseModel):
+    counts: dict[TodoState, int]
+    total: int
+
+
+# Espelham TodoPublic/TodoList (mesma ordem de campos) para serializar
+# linhas do banco sem validação
+class TodoRow(TypedDict):
+    title: str
+    description: str
+    state: TodoState
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class TodoListRows(TypedDict):
+    todos: list[TodoRow]
+    next_cursor: str | None
 
 
 class TodoUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
     state: TodoState | None = None
+
+
+class TodoBulkCreate(BaseModel):
+    todos: list[TodoSchema] = Field(min_length=1)
+
+
+class TodoBulkUpdateItem(TodoUpdate):
+    id: int
+
+
+class TodoBulkUpdate(BaseModel):
+    todos: list[TodoBulkUpdateItem] = Field(min_length=1)
+
+
+class TodoBulkDelete(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+
+class TodoBulkItemResult(BaseModel):
+    id: int
+    status: int
+    todo: TodoPublic | None = None
+    detail: str | None = None
+
+
+class TodoBulkResult(BaseModel):
+    results: list[TodoBulkItemResult]
+
+
+class TodoFilterResult(BaseModel):
+    affected: int
@@ -1,5 +1,10 @@
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from time import perf_counter
+from typing import NamedTuple
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
@@ -12,8 +17,15 @@ from pwdlib import PasswordHash
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fastapi_zero.database import get_session
+from fastapi_zero.cache import token_cache, wrote_recently
+from fastapi_zero.database import get_read_session, get_session
+from fastapi_zero.metrics import (
+    PASSWORD_HASH_DURATION,
+    PASSWORD_HASH_QUEUE_DEPTH,
+    PASSWORD_HASH_REJECTED,
+)
 from fastapi_zero.models import User
+from fastapi_zero.observability import record, timed
 from fastapi_zero.settings import Settings
 
 pwd_context = PasswordHash.recommended()
@@ -23,6 +35,12 @@ oauth2_scheme = OAuth2PasswordBearer(
 settings = Settings()
 
 
+class Principal(NamedTuple):
+    id: int
+    username: str
+    email: str
+
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
@@ -43,6 +61,135 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHashPoolBusy(Exception):
+    pass
+
+
+class PasswordHashPool:
+    def __init__(
+        self, workers: int, queue_size: int, executor='thread'
+    ):
+        self.workers = workers
+        self.max_pending = workers + queue_size
+        self.executor_type = executor
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self._executor = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor
+                if self.executor_type == 'process'
+                else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, func, *args):
+        # pending só muda dentro do event loop, dispensa lock
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            PASSWORD_HASH_REJECTED.inc()
+            raise PasswordHashPoolBusy
+
+        self.pending += 1
+        self.update_queue_depth()
+        start = perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.executor, func, *args
+            )
+        finally:
+            self.pending -= 1
+            self.update_queue_depth()
+            elapsed = perf_counter() - start
+            record('hash', elapsed)
+            PASSWORD_HASH_DURATION.observe(elapsed)
+            self.completed += 1
+            self.latency_total += elapsed
+            self.latency_max = max(self.latency_max, elapsed)
+
+    def update_queue_depth(self):
+        PASSWORD_HASH_QUEUE_DEPTH.set(self.stats()['queue_depth'])
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'in_flight': min(self.pending, self.workers),
+            'queue_depth': max(self.pending - self.workers, 0),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'latency_avg': (
+                self.latency_total / self.completed
+                if self.completed
+                else 0.0
+            ),
+            'latency_max': self.latency_max,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+)
+
+
+async def _run_in_hash_pool(func, *args):
+    try:
+        return await password_hash_pool.run(func, *args)
+    except PasswordHashPoolBusy:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Server busy, try again later',
+            headers={
+                'Retry-After': str(settings.PASSWORD_HASH_RETRY_AFTER)
+            },
+        )
+
+
+async def get_password_hash_async(password: str):
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+):
+    return await _run_in_hash_pool(
+        verify_password, plain_password, hashed_password
+    )
+
+
+def decode_token(token: str) -> dict:
+    # SECRET_KEY e ALGORITHM entram na chave: se mudarem, o cache
+    # antigo deixa de ser consultado e o token é verificado de novo.
+    key = hashlib.sha256(
+        f'{settings.ALGORITHM}:{settings.SECRET_KEY}:{token}'.encode()
+    ).digest()
+    claims = token_cache.get(key)
+
+    if claims is None:
+        claims = decode(
+            token,
+            settings.SECRET_KEY,
+            algorithms=[settings.ALGORITHM],
+        )
+        if 'exp' in claims:
+            token_cache.set(key, claims, expires_at=claims['exp'])
+
+    return claims
+
+
 async def get_current_user(
     session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_scheme),
@@ -53,28 +200,41 @@ async def get_current_user(
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
-    try:
-        payload = decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        subject_email = payload.get('sub')
+    with timed('auth'):
+        try:
+            payload = decode_token(token)
+            subject_email = payload.get('sub')
 
-        if not subject_email:
+            if not subject_email:
+                raise credentials_exception
+
+        except DecodeError:
             raise credentials_exception
 
-    except DecodeError:
-        raise credentials_exception
+        except ExpiredSignatureError:
+            raise credentials_exception
+
+    # Fora do timer: a consulta já entra na fase db
+    row = (
+        await session.execute(
+            select(User.id, User.username, User.email).where(
+                User.email == subject_email
+            )
+        )
+    ).first()
 
-    except ExpiredSignatureError:
+    if not row:
         raise credentials_exception
 
-    user = await session.scalar(
-        select(User).where(User.email == subject_email)
-    )
+    return Principal(*row)
 
-    if not user:
-        raise credentials_exception
 
-    return user
+async def get_user_read_session(
+    user: Principal = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+    read_session: AsyncSession = Depends(get_read_session),
+):
+    # Read-your-writes: logo após escrever, o usuário lê do primário
+    if wrote_recently(user.id):
+        return session
+    return read_session
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,3 +11,59 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+    LOG_LEVEL: str = 'INFO'
+    SERVER_TIMING_SAMPLE_RATE: float = 0.05
+    SLOW_QUERY_THRESHOLD_MS: float | None = 200
+    SLOW_QUERY_LOG_INTERVAL: int = 60
+    SLOW_QUERY_MAX_SHAPES: int = 1024
+
+    STARTUP_WARM_UP: bool = True
+    STARTUP_WARM_CONNECTIONS: int = 1
+
+    DATABASE_READ_URL: str | None = None
+    READ_YOUR_WRITES_SECONDS: float = 5
+    SQLITE_REPLICA_REFRESH_SECONDS: float | None = None
+
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+
+    SQLITE_JOURNAL_MODE: Literal['WAL', 'DELETE', 'TRUNCATE'] = 'WAL'
+    SQLITE_SYNCHRONOUS: Literal['OFF', 'NORMAL', 'FULL'] = 'NORMAL'
+    SQLITE_BUSY_TIMEOUT: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -64 * 1024
+
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    PASSWORD_HASH_RETRY_AFTER: int = 1
+
+    LOGIN_THROTTLE_BACKEND: Literal['memory', 'sqlite'] = 'memory'
+    LOGIN_THROTTLE_SQLITE_PATH: str = 'login_throttle.db'
+    LOGIN_THROTTLE_MAX_ENTRIES: int = 100_000
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 30
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_USERNAME_PER_MINUTE: float = 5
+
+    TODO_BULK_MAX_ITEMS: int = 500
+    TODO_FILTER_BATCH_SIZE: int = 500
+    FAST_JSON_RESPONSES: bool = False
+    TODO_TOMBSTONE_RETENTION_DAYS: int = 30
+    TODO_TOMBSTONE_COMPACT_SECONDS: float | None = 3600
+    TODO_CHANGES_SAFETY_SECONDS: int = 2
+
+    TODO_EVENTS_QUEUE_SIZE: int = 100
+    TODO_EVENTS_KEEPALIVE_SECONDS: float = 15
+    TODO_EVENTS_RELAY: Literal['none', 'sqlite'] = 'none'
+    TODO_EVENTS_RELAY_PATH: str = 'todo_events.db'
+    TODO_EVENTS_RELAY_POLL_SECONDS: float = 0.5
+    TODO_EVENTS_RELAY_RETENTION_SECONDS: float = 60
+    TODO_EXPORT_CHUNK_SIZE: int = 500
+
+    TODO_CACHE_MAX_ENTRIES: int = 10_000
+    TODO_CACHE_TTL: int = 60
+    TODO_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
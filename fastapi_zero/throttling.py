@@ -0,0 +1,201 @@
+import asyncio
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from fastapi_zero.settings import Settings
+
+settings = Settings()
+
+
+def refill(tokens, updated, now, rate, capacity):
+    tokens = min(capacity, tokens + max(now - updated, 0) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class TokenBucket:
+    def __init__(
+        self, rate: float, capacity: int, max_entries: int, clock=None
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_entries = max_entries
+        self.clock = clock or time.monotonic
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key) -> float:
+        now = self.clock()
+
+        with self._lock:
+            tokens, updated = self._buckets.pop(
+                key, (self.capacity, now)
+            )
+            tokens, retry_after = refill(
+                tokens, updated, now, self.rate, self.capacity
+            )
+
+            # Reinsere no fim: a chave mais antiga sai primeiro e uma
+            # chave esquecida equivale a um balde cheio
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_entries:
+                self._buckets.popitem(last=False)
+
+            return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteTokenBucket:
+    PRUNE_EVERY = 1000
+
+    def __init__(
+        self,
+        path: str,
+        name: str,
+        rate: float,
+        capacity: int,
+        clock=None,
+    ):
+        self.path = path
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock or time.time
+        self.calls = 0
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(
+                self.path,
+                timeout=1,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS token_buckets ('
+                'name TEXT, key TEXT, tokens REAL, updated REAL, '
+                'PRIMARY KEY (name, key))'
+            )
+        return self._connection
+
+    def acquire(self, key) -> float:
+        now = self.clock()
+
+        with self._lock:
+            connection = self.connection
+            # IMMEDIATE trava a escrita: workers não leem o mesmo
+            # saldo ao mesmo tempo
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                retry_after = self._acquire(connection, key, now)
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            connection.execute('COMMIT')
+
+            return retry_after
+
+    def _acquire(self, connection, key, now: float) -> float:
+        row = connection.execute(
+            'SELECT tokens, updated FROM token_buckets '
+            'WHERE name = ? AND key = ?',
+            (self.name, key),
+        ).fetchone()
+        tokens, retry_after = refill(
+            *(row or (self.capacity, now)),
+            now,
+            self.rate,
+            self.capacity,
+        )
+        connection.execute(
+            'INSERT OR REPLACE INTO token_buckets '
+            'VALUES (?, ?, ?, ?)',
+            (self.name, key, tokens, now),
+        )
+
+        self.calls += 1
+        if self.calls % self.PRUNE_EVERY == 0:
+            self.prune(now)
+
+        return retry_after
+
+    def prune(self, now: float):
+        # Depois de capacity/rate segundos o balde está cheio de novo
+        self.connection.execute(
+            'DELETE FROM token_buckets '
+            'WHERE name = ? AND updated < ?',
+            (self.name, now - self.capacity / self.rate),
+        )
+
+    def clear(self):
+        with self._lock:
+            self.connection.execute(
+                'DELETE FROM token_buckets WHERE name = ?',
+                (self.name,),
+            )
+
+
+def create_bucket(name: str, per_minute: float, capacity: int):
+    if settings.LOGIN_THROTTLE_BACKEND == 'sqlite':
+        return SQLiteTokenBucket(
+            settings.LOGIN_THROTTLE_SQLITE_PATH,
+            name,
+            per_minute / 60,
+            capacity,
+        )
+    return TokenBucket(
+        per_minute / 60, capacity, settings.LOGIN_THROTTLE_MAX_ENTRIES
+    )
+
+
+ip_bucket = create_bucket(
+    'ip', settings.LOGIN_IP_PER_MINUTE, settings.LOGIN_IP_BURST
+)
+username_bucket = create_bucket(
+    'username',
+    settings.LOGIN_USERNAME_PER_MINUTE,
+    settings.LOGIN_USERNAME_BURST,
+)
+
+
+async def acquire(bucket, key) -> float:
+    if not isinstance(bucket, SQLiteTokenBucket):
+        return bucket.acquire(key)
+
+    # I/O e espera pelo lock de outros workers fora do event loop
+    try:
+        return await asyncio.to_thread(bucket.acquire, key)
+    except sqlite3.OperationalError:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Login throttle unavailable, try again later',
+            headers={'Retry-After': '1'},
+        )
+
+
+async def check_login_throttle(ip: str | None, username: str):
+    for bucket, key in (
+        (ip_bucket, ip or 'unknown'),
+        (username_bucket, username.strip().casefold()),
+    ):
+        retry_after = await acquire(bucket, key)
+        if retry_after:
+            raise HTTPException(
+                status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                detail='Too many login attempts, try again later',
+                headers={'Retry-After': str(math.ceil(retry_after))},
+            )
@@ -0,0 +1,33 @@
+"""add todos indexes
+
+Revision ID: 9b1d2f4c7e10
+Revises: 6e20fcafa034
+Create Date: 2026-10-18 10:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1d2f4c7e10'
+down_revision: Union[str, Sequence[str], None] = '6e20fcafa034'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX não precisa recriar a tabela no SQLite
+    op.create_index('ix_todos_user_id_id', 'todos', ['user_id', 'id'], unique=False)
+    op.create_index('ix_todos_user_id_state_id', 'todos', ['user_id', 'state', 'id'], unique=False)
+    op.create_index('ix_todos_user_id_updated_at', 'todos', ['user_id', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_todos_user_id_updated_at', table_name='todos')
+    op.drop_index('ix_todos_user_id_state_id', table_name='todos')
+    op.drop_index('ix_todos_user_id_id', table_name='todos')
@@ -0,0 +1,57 @@
+"""create todo_tombstones
+
+Revision ID: a7c3e91f0b25
+Revises: d5a83c91b6f2
+Create Date: 2026-10-18 14:20:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c3e91f0b25'
+down_revision: Union[str, Sequence[str], None] = 'd5a83c91b6f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'todo_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('todo_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'deleted_at',
+            sa.DateTime(),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_todo_tombstones_user_id_deleted_at',
+        'todo_tombstones',
+        ['user_id', 'deleted_at'],
+    )
+    op.execute("""
+        CREATE TRIGGER todos_tombstone_ad AFTER DELETE ON todos
+        BEGIN
+            INSERT INTO todo_tombstones (todo_id, user_id)
+            VALUES (old.id, old.user_id);
+        END
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER todos_tombstone_ad')
+    op.drop_index(
+        'ix_todo_tombstones_user_id_deleted_at',
+        table_name='todo_tombstones',
+    )
+    op.drop_table('todo_tombstones')
@@ -0,0 +1,43 @@
+"""drop tombstones of reused todo ids
+
+Revision ID: b84e0d6c3a19
+Revises: f19b6d2a8c47
+Create Date: 2026-10-18 19:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b84e0d6c3a19'
+down_revision: Union[str, Sequence[str], None] = 'f19b6d2a8c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # todos.id não tem AUTOINCREMENT: um id reusado pelo mesmo
+    # usuário invalida a lápide do todo apagado antes
+    op.execute("""
+        CREATE TRIGGER todos_tombstone_ai AFTER INSERT ON todos
+        BEGIN
+            DELETE FROM todo_tombstones
+            WHERE user_id = new.user_id AND todo_id = new.id;
+        END
+    """)
+    op.execute("""
+        DELETE FROM todo_tombstones
+        WHERE EXISTS (
+            SELECT 1 FROM todos
+            WHERE todos.id = todo_tombstones.todo_id
+            AND todos.user_id = todo_tombstones.user_id
+        )
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER todos_tombstone_ai')
@@ -0,0 +1,62 @@
+"""create todos_fts
+
+Revision ID: d5a83c91b6f2
+Revises: 9b1d2f4c7e10
+Create Date: 2026-10-18 11:03:12.904771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a83c91b6f2'
+down_revision: Union[str, Sequence[str], None] = '9b1d2f4c7e10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("""
+        CREATE VIRTUAL TABLE todos_fts USING fts5(
+            title, description, content='todos', content_rowid='id'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos
+        BEGIN
+            INSERT INTO todos_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos
+        BEGIN
+            INSERT INTO todos_fts (todos_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER todos_fts_au
+        AFTER UPDATE OF title, description ON todos
+        BEGIN
+            INSERT INTO todos_fts (todos_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO todos_fts (rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """)
+
+    # Indexa os todos que já existem
+    op.execute("INSERT INTO todos_fts (todos_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER todos_fts_au')
+    op.execute('DROP TRIGGER todos_fts_ad')
+    op.execute('DROP TRIGGER todos_fts_ai')
+    op.execute('DROP TABLE todos_fts')
@@ -0,0 +1,78 @@
+"""create todo_state_counts
+
+Revision ID: f19b6d2a8c47
+Revises: a7c3e91f0b25
+Create Date: 2026-10-18 15:02:17.530611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f19b6d2a8c47'
+down_revision: Union[str, Sequence[str], None] = 'a7c3e91f0b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'todo_state_counts',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column(
+            'state',
+            sa.Enum(
+                'draft', 'todo', 'doing', 'done', 'trash',
+                name='todostate',
+            ),
+            nullable=False,
+        ),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'state'),
+    )
+    op.execute("""
+        CREATE TRIGGER todo_state_counts_ai AFTER INSERT ON todos
+        BEGIN
+            INSERT INTO todo_state_counts (user_id, state, count)
+            VALUES (new.user_id, new.state, 1)
+            ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER todo_state_counts_ad AFTER DELETE ON todos
+        BEGIN
+            UPDATE todo_state_counts SET count = count - 1
+            WHERE user_id = old.user_id AND state = old.state;
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER todo_state_counts_au
+        AFTER UPDATE OF state, user_id ON todos
+        WHEN old.state IS NOT new.state OR old.user_id IS NOT new.user_id
+        BEGIN
+            UPDATE todo_state_counts SET count = count - 1
+            WHERE user_id = old.user_id AND state = old.state;
+            INSERT INTO todo_state_counts (user_id, state, count)
+            VALUES (new.user_id, new.state, 1)
+            ON CONFLICT (user_id, state) DO UPDATE SET count = count + 1;
+        END
+    """)
+
+    # Preenche os contadores dos todos que já existem
+    op.execute("""
+        INSERT INTO todo_state_counts (user_id, state, count)
+        SELECT user_id, state, count(*) FROM todos
+        GROUP BY user_id, state
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP TRIGGER todo_state_counts_au')
+    op.execute('DROP TRIGGER todo_state_counts_ad')
+    op.execute('DROP TRIGGER todo_state_counts_ai')
+    op.drop_table('todo_state_counts')
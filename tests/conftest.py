@@ -9,10 +9,13 @@ from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
+from fastapi_zero import lifespan
 from fastapi_zero.app import app
-from fastapi_zero.database import get_session
+from fastapi_zero.cache import todo_list_cache, user_writes
+from fastapi_zero.database import get_read_session, get_session
 from fastapi_zero.models import User, table_registry
 from fastapi_zero.security import get_password_hash
+from fastapi_zero.throttling import ip_bucket, username_bucket
 
 
 class UserFactory(factory.Factory):
@@ -29,12 +32,26 @@ class UserFactory(factory.Factory):
 
 
 @pytest.fixture
-def client(session):
+def client(session, monkeypatch):
     def get_session_override():
         return session
 
+    # Warm-up e tarefas periódicas tocam o banco real: testes à parte
+    monkeypatch.setattr(lifespan.settings, 'STARTUP_WARM_UP', False)
+    monkeypatch.setattr(
+        lifespan.settings, 'TODO_TOMBSTONE_COMPACT_SECONDS', None
+    )
+
+    todo_list_cache.clear()
+    user_writes.clear()
+    ip_bucket.clear()
+    username_bucket.clear()
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = (
+            get_session_override
+        )
         yield client
 
     app.dependency_overrides.clear()
@@ -60,6 +77,23 @@ async def session():
         await conn.run_sync(table_registry.metadata.drop_all)
 
 
+@pytest_asyncio.fixture
+async def replica_session():
+    # Réplica vazia: simula uma que ainda não recebeu as escritas
+    engine = create_async_engine(
+        'sqlite+aiosqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine) as session:
+        yield session
+
+    await engine.dispose()
+
+
 @contextmanager
 def _mock_db_time(model, time=datetime(2025, 5, 20)):
     def fake_time_hook(mapper, connection, target):
@@ -80,6 +114,30 @@ def mock_db_time():
     return _mock_db_time
 
 
+@contextmanager
+def _count_statements(session):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.bind.sync_engine
+    event.listen(
+        engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+    yield statements
+
+    event.remove(
+        engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+
+@pytest.fixture
+def count_statements(session):
+    return lambda: _count_statements(session)
+
+
 @pytest_asyncio.fixture
 async def user(session):
     password = 'testtest'
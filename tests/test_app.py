@@ -1,5 +1,18 @@
+import asyncio
+import logging
 from http import HTTPStatus
 
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from fastapi_zero import lifespan, observability
+from fastapi_zero.app import app
+from fastapi_zero.conditional import etag_matches, weak_etag
+from fastapi_zero.database import create_engine_from_settings
+from fastapi_zero.lifespan import warm_up_database
+from fastapi_zero.settings import Settings
+
 
 def test_root_deve_retornar_ola_mundo(client):
     response = client.get('/')
@@ -20,3 +33,118 @@ def teste_get_token(client, user):
     assert response.status_code == HTTPStatus.OK
     assert token['token_type'] == 'Bearer'
     assert 'access_token' in token
+
+
+def test_etag_matches():
+    etag = weak_etag('a', 1)
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"x", {etag.removeprefix("W/")}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(weak_etag('b', 1), etag)
+
+
+def test_server_timing_header(client, token, monkeypatch):
+    monkeypatch.setattr(
+        observability.settings, 'SERVER_TIMING_SAMPLE_RATE', 1.0
+    )
+
+    response = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    metrics = response.headers['Server-Timing']
+    assert response.status_code == HTTPStatus.OK
+    assert 'auth;dur=' in metrics
+    assert 'serialize;dur=' in metrics
+    assert 'db;dur=' in metrics
+    assert 'queries"' in metrics
+    assert 'total;dur=' in metrics
+
+
+def test_server_timing_outside_sample(client, monkeypatch):
+    monkeypatch.setattr(
+        observability.settings, 'SERVER_TIMING_SAMPLE_RATE', 0.0
+    )
+
+    response = client.get('/')
+
+    assert 'Server-Timing' not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_warm_up_database_fills_the_pool(tmp_path):
+    engine = create_engine_from_settings(
+        Settings(), url=f'sqlite+aiosqlite:///{tmp_path}/warm.db'
+    )
+
+    await warm_up_database(engine, 3)
+
+    assert engine.pool.checkedin() == 3  # noqa: PLR2004
+    assert engine.pool.checkedout() == 0
+    await engine.dispose()
+
+
+def test_lifespan_warms_up_and_disposes(
+    tmp_path, monkeypatch, caplog
+):
+    engine = create_engine_from_settings(
+        Settings(), url=f'sqlite+aiosqlite:///{tmp_path}/warm.db'
+    )
+    read_engine = create_engine_from_settings(
+        Settings(),
+        url=f'sqlite+aiosqlite:///{tmp_path}/warm.db',
+        read_only=True,
+    )
+    monkeypatch.setattr(lifespan, 'engine', engine)
+    monkeypatch.setattr(lifespan, 'read_engine', read_engine)
+    monkeypatch.setattr(lifespan.settings, 'STARTUP_WARM_UP', True)
+    caplog.set_level(logging.INFO, logger=lifespan.__name__)
+
+    with TestClient(app) as client:
+        assert engine.pool.checkedin() == 1
+        assert read_engine.pool.checkedin() == 1
+        assert app.openapi_schema is not None
+        assert client.get('/').status_code == HTTPStatus.OK
+
+    assert engine.pool.checkedin() == 0
+    assert read_engine.pool.checkedin() == 0
+    assert 'startup complete in' in caplog.text
+    for phase in (
+        'database',
+        'read_database',
+        'openapi',
+        'password_hash',
+    ):
+        assert f'{phase}=' in caplog.text
+        assert REGISTRY.get_sample_value(
+            'app_startup_duration_seconds', {'phase': phase}
+        )
+
+
+def test_lifespan_waits_for_background_tasks(monkeypatch):
+    events = []
+
+    async def compact(interval):
+        try:
+            await asyncio.sleep(interval)
+        finally:
+            # Limpeza que ainda precisa do loop após o cancelamento
+            await asyncio.sleep(0.01)
+            events.append('task')
+
+    monkeypatch.setattr(
+        lifespan, 'compact_tombstones_periodically', compact
+    )
+    monkeypatch.setattr(
+        lifespan, 'mark_process_dead', lambda: events.append('exit')
+    )
+    monkeypatch.setattr(
+        lifespan.settings, 'TODO_TOMBSTONE_COMPACT_SECONDS', 60
+    )
+
+    with TestClient(app):
+        assert not events
+
+    assert events == ['task', 'exit']
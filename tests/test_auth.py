@@ -1,7 +1,18 @@
+import sqlite3
 from http import HTTPStatus
 
+import pytest
+from fastapi import HTTPException
 from freezegun import freeze_time
 
+from fastapi_zero.security import password_hash_pool
+from fastapi_zero.throttling import (
+    SQLiteTokenBucket,
+    TokenBucket,
+    acquire,
+    settings,
+)
+
 
 def teste_get_token(client, user):
     response = client.post(
@@ -80,3 +91,82 @@ def test_token_expired_dont_refresh(client, user):
         assert response.json() == {
             'detail': 'Could not validate credentials'
         }
+
+
+def test_login_throttled_by_username_before_hashing(client, user):
+    data = {'username': user.email, 'password': 'errada'}
+    for _ in range(settings.LOGIN_USERNAME_BURST):
+        assert (
+            client.post('/auth/token', data=data).status_code
+            == HTTPStatus.BAD_REQUEST
+        )
+    completed = password_hash_pool.completed
+
+    data['username'] = user.email.upper()
+    response = client.post('/auth/token', data=data)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response.headers['Retry-After']) >= 1
+    assert password_hash_pool.completed == completed
+
+
+def test_login_throttled_by_ip(client):
+    for index in range(settings.LOGIN_IP_BURST):
+        client.post(
+            '/auth/token',
+            data={'username': f'x{index}@test.com', 'password': 'x'},
+        )
+
+    response = client.post(
+        '/auth/token',
+        data={'username': 'outro@test.com', 'password': 'x'},
+    )
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_token_bucket_refills_and_evicts():
+    now = [0.0]
+    bucket = TokenBucket(
+        rate=1, capacity=2, max_entries=2, clock=lambda: now[0]
+    )
+
+    assert bucket.acquire('a') == 0
+    assert bucket.acquire('a') == 0
+    assert bucket.acquire('a') == 1
+
+    now[0] = 1.5
+    assert bucket.acquire('a') == 0
+    assert bucket.acquire('a') == pytest.approx(0.5)
+
+    bucket.acquire('b')
+    bucket.acquire('c')
+    assert list(bucket._buckets) == ['b', 'c']
+
+
+def test_sqlite_token_bucket_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'throttle.db')
+    worker_a = SQLiteTokenBucket(path, 'ip', rate=1, capacity=2)
+    worker_b = SQLiteTokenBucket(path, 'ip', rate=1, capacity=2)
+
+    assert worker_a.acquire('1.2.3.4') == 0
+    assert worker_b.acquire('1.2.3.4') == 0
+    assert worker_a.acquire('1.2.3.4') > 0
+    assert worker_b.acquire('5.6.7.8') == 0
+
+
+@pytest.mark.asyncio
+async def test_sqlite_token_bucket_locked_returns_503(tmp_path):
+    path = str(tmp_path / 'throttle.db')
+    bucket = SQLiteTokenBucket(path, 'ip', rate=1, capacity=2)
+    bucket.acquire('1.2.3.4')
+    other_worker = sqlite3.connect(path, isolation_level=None)
+    other_worker.execute('BEGIN IMMEDIATE')
+
+    with pytest.raises(HTTPException) as error:
+        await acquire(bucket, '1.2.3.4')
+
+    other_worker.execute('ROLLBACK')
+    other_worker.close()
+    assert error.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert error.value.headers == {'Retry-After': '1'}
@@ -0,0 +1,94 @@
+import time
+
+from freezegun import freeze_time
+
+from fastapi_zero.cache import (
+    LRUCache,
+    invalidate_user,
+    mark_replica_synced,
+    replica_sync,
+    user_generation,
+    wrote_recently,
+)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3  # noqa: PLR2004
+    assert cache.stats()['evictions'] == 1
+
+
+def test_lru_cache_respects_memory_cap():
+    cache = LRUCache(max_entries=10, max_bytes=10)
+    cache.set('a', b'x' * 6, size=6)
+    cache.set('b', b'y' * 6, size=6)
+
+    assert cache.get('a') is None
+    assert cache.stats()['size_bytes'] == 6  # noqa: PLR2004
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(max_entries=10, ttl=60)
+
+    with freeze_time('2025-01-01 12:00:00'):
+        cache.set('a', 1)
+
+    with freeze_time('2025-01-01 12:00:59'):
+        assert cache.get('a') == 1
+
+    with freeze_time('2025-01-01 12:01:01'):
+        assert cache.get('a') is None
+
+
+def test_lru_cache_stats():
+    cache = LRUCache(max_entries=10)
+    cache.set('a', 1)
+    cache.get('a')
+    cache.get('b')
+
+    assert cache.stats() == {
+        'entries': 1,
+        'size_bytes': 0,
+        'hits': 1,
+        'misses': 1,
+        'evictions': 0,
+        'hit_ratio': 0.5,
+    }
+
+
+def test_invalidate_user_changes_generation():
+    generation = user_generation(42)
+    invalidate_user(42)
+
+    assert user_generation(42) != generation
+
+
+def test_read_your_writes_waits_for_replica_refresh(monkeypatch):
+    settings = 'fastapi_zero.cache.settings'
+    monkeypatch.setattr(
+        f'{settings}.DATABASE_READ_URL', 'sqlite:///replica.db'
+    )
+    monkeypatch.setattr(
+        f'{settings}.SQLITE_REPLICA_REFRESH_SECONDS', 60
+    )
+    monkeypatch.setattr(f'{settings}.READ_YOUR_WRITES_SECONDS', 0)
+    monkeypatch.setitem(replica_sync, 'started_at', None)
+    monkeypatch.setattr('fastapi_zero.cache.user_writes', {})
+
+    before_write = time.monotonic()
+    invalidate_user(1)
+    # A janela fixa já passou, mas nenhuma cópia viu a escrita
+    assert wrote_recently(1)
+
+    mark_replica_synced(before_write)
+    assert wrote_recently(1)
+
+    mark_replica_synced(time.monotonic())
+    assert not wrote_recently(1)
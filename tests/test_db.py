@@ -1,10 +1,18 @@
+import logging
 from dataclasses import asdict
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from fastapi_zero.models import User
+from fastapi_zero.database import (
+    create_engine_from_settings,
+    refresh_sqlite_replica,
+)
+from fastapi_zero.models import User, table_registry
+from fastapi_zero.settings import Settings
 
 
 @pytest.mark.asyncio
@@ -20,7 +28,9 @@ async def test_create_user(session: AsyncSession, mock_db_time):
         await session.commit()
 
         user = await session.scalar(
-            select(User).where(User.username == 'test')
+            select(User)
+            .where(User.username == 'test')
+            .options(selectinload(User.todos))
         )
 
     assert asdict(user) == {
@@ -32,3 +42,84 @@ async def test_create_user(session: AsyncSession, mock_db_time):
         'updated_at': time,
         'todos': [],
     }
+
+
+@pytest.mark.asyncio
+async def test_engine_applies_sqlite_pragmas(tmp_path, caplog):
+    settings = Settings(
+        DATABASE_URL=f'sqlite+aiosqlite:///{tmp_path / "test.db"}',
+        DATABASE_POOL_SIZE=3,
+        SQLITE_BUSY_TIMEOUT=1234,
+    )
+    engine = create_engine_from_settings(settings)
+
+    with caplog.at_level(
+        logging.INFO, logger='fastapi_zero.database'
+    ):
+        async with engine.connect() as conn:
+            journal_mode = await conn.scalar(
+                text('PRAGMA journal_mode')
+            )
+            busy_timeout = await conn.scalar(
+                text('PRAGMA busy_timeout')
+            )
+            synchronous = await conn.scalar(
+                text('PRAGMA synchronous')
+            )
+
+    await engine.dispose()
+
+    assert journal_mode == 'wal'
+    assert busy_timeout == 1234  # noqa: PLR2004
+    assert synchronous == 1  # NORMAL
+    assert engine.pool.size() == 3  # noqa: PLR2004
+    assert 'journal_mode=wal' in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_engine_ready_log_on_memory_database(caplog):
+    settings = Settings(DATABASE_URL='sqlite+aiosqlite:///:memory:')
+    engine = create_engine_from_settings(settings)
+
+    with caplog.at_level(
+        logging.INFO, logger='fastapi_zero.database'
+    ):
+        async with engine.connect() as conn:
+            result = await conn.scalar(text('SELECT 1'))
+
+    await engine.dispose()
+
+    assert result == 1
+    assert 'mmap_size=None' in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_read_only_replica_refreshed_by_backup(tmp_path):
+    primary_url = f'sqlite+aiosqlite:///{tmp_path / "primary.db"}'
+    replica_url = (
+        f'sqlite+aiosqlite:///file:{tmp_path / "replica.db"}'
+        '?mode=ro&uri=true'
+    )
+    settings = Settings(DATABASE_URL=primary_url)
+    primary = create_engine_from_settings(settings)
+    replica = create_engine_from_settings(
+        settings, url=replica_url, read_only=True
+    )
+
+    async with primary.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            insert(User).values(
+                username='alice', email='alice@test', password='x'
+            )
+        )
+
+    refresh_sqlite_replica(primary_url, replica_url)
+
+    async with replica.connect() as conn:
+        assert await conn.scalar(select(User.username)) == 'alice'
+        with pytest.raises(OperationalError, match='readonly'):
+            await conn.execute(delete(User))
+
+    await primary.dispose()
+    await replica.dispose()
@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+
+from fastapi_zero.events import (
+    DROPPED,
+    EventBroker,
+    SQLiteEventRelay,
+    event_broker,
+)
+from fastapi_zero.routers.todos import settings, stream_todo_events
+from fastapi_zero.security import Principal
+
+
+@pytest.mark.asyncio
+async def test_broker_delivers_only_to_the_users_subscribers():
+    broker = EventBroker(queue_size=10)
+    mine = broker.subscribe(1)
+    other = broker.subscribe(2)
+
+    broker.publish(1, {'type': 'created', 'todo': {'id': 1}})
+
+    assert mine.queue.get_nowait() == {
+        'type': 'created',
+        'todo': {'id': 1},
+    }
+    assert other.queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_broker_drops_slow_consumer():
+    broker = EventBroker(queue_size=2)
+    slow = broker.subscribe(1)
+
+    for todo_id in range(3):
+        broker.publish(
+            1, {'type': 'deleted', 'todo': {'id': todo_id}}
+        )
+
+    assert slow.queue.get_nowait() is DROPPED
+    assert slow.queue.empty()
+    assert broker.dropped == 1
+    assert not broker._subscribers
+
+
+@pytest.mark.asyncio
+async def test_sqlite_relay_reaches_other_workers(tmp_path):
+    path = str(tmp_path / 'events.db')
+    worker_a = EventBroker(10, relay=SQLiteEventRelay(path, 60))
+    worker_b = EventBroker(10, relay=SQLiteEventRelay(path, 60))
+    worker_b.relay.origin = -1
+    worker_b.relay.poll()
+    subscription = worker_b.subscribe(1)
+
+    worker_a.publish(1, {'type': 'created', 'todo': {'id': 7}})
+    # publish só enfileira; a escrita é feita pela thread do relay
+    assert worker_b.relay.poll() == []
+    worker_a.relay.flush()
+    for user_id, event in worker_b.relay.poll():
+        worker_b.deliver(user_id, event)
+
+    assert subscription.queue.get_nowait()['todo'] == {'id': 7}
+    # O próprio worker não recebe de volta o que publicou
+    assert worker_a.relay.poll() == []
+
+
+@pytest.mark.asyncio
+async def test_sqlite_relay_flushes_pending_on_shutdown(tmp_path):
+    path = str(tmp_path / 'events.db')
+    relay = SQLiteEventRelay(path, 60)
+    reader = SQLiteEventRelay(path, 60)
+    reader.origin = -1
+    reader.poll()
+    task = asyncio.create_task(relay.run(EventBroker(10), 60))
+    await asyncio.sleep(0)
+
+    relay.append(1, {'type': 'deleted', 'todo': {'id': 3}})
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert reader.poll() == [
+        (1, {'type': 'deleted', 'todo': {'id': 3}})
+    ]
+
+
+def test_todo_handlers_publish_after_commit(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    subscription = event_broker.subscribe(user.id)
+
+    created = client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'Test todo', 'description': 'desc'},
+    ).json()
+    client.patch(
+        f'/todos/{created["id"]}',
+        headers=headers,
+        json={'state': 'done'},
+    )
+    client.delete(f'/todos/{created["id"]}', headers=headers)
+    event_broker.unsubscribe(subscription)
+
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait())
+
+    assert [event['type'] for event in events] == [
+        'created',
+        'updated',
+        'deleted',
+    ]
+    assert events[0]['todo'] == created
+    assert events[1]['todo']['state'] == 'done'
+    assert events[2]['todo'] == {'id': created['id']}
+
+
+@pytest.mark.asyncio
+async def test_todo_events_stream_as_sse(monkeypatch):
+    monkeypatch.setattr(
+        settings, 'TODO_EVENTS_KEEPALIVE_SECONDS', 0.01
+    )
+    response = await stream_todo_events(
+        Principal(1, 'test', 'e@e.com')
+    )
+    stream = response.body_iterator
+
+    assert response.media_type == 'text/event-stream'
+    assert await anext(stream) == ': connected\n\n'
+    assert await anext(stream) == ': keep-alive\n\n'
+
+    event_broker.publish(1, {'type': 'deleted', 'todo': {'id': 3}})
+    assert (
+        await anext(stream) == 'event: deleted\ndata: {"id": 3}\n\n'
+    )
+
+    for todo_id in range(settings.TODO_EVENTS_QUEUE_SIZE + 1):
+        event_broker.publish(
+            1, {'type': 'deleted', 'todo': {'id': todo_id}}
+        )
+    assert await anext(stream) == 'event: dropped\ndata: {}\n\n'
+    with pytest.raises(StopAsyncIteration):
+        await anext(stream)
+    assert 1 not in event_broker._subscribers
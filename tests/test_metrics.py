@@ -0,0 +1,107 @@
+import os
+from http import HTTPStatus
+
+from prometheus_client import REGISTRY
+
+from fastapi_zero.cache import LRUCache
+from fastapi_zero.metrics import (
+    instrument_cache,
+    instrument_engine,
+    mark_process_dead,
+)
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_count_requests_by_route_template(
+    client, user, token
+):
+    labels = {'method': 'GET', 'route': '/users/{user_id}'}
+    before = sample('http_requests_total', status='200', **labels)
+
+    client.get(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert 'http_request_duration_seconds_bucket' in response.text
+    assert 'http_requests_in_flight' in response.text
+    assert (
+        sample('http_requests_total', status='200', **labels)
+        == before + 1
+    )
+    assert f'/users/{user.id}"' not in response.text
+
+
+def test_metrics_unknown_route_does_not_add_labels(client):
+    before = sample(
+        'http_requests_total',
+        method='GET',
+        route='unmatched',
+        status='404',
+    )
+
+    client.get('/nao-existe/123')
+
+    assert (
+        sample(
+            'http_requests_total',
+            method='GET',
+            route='unmatched',
+            status='404',
+        )
+        == before + 1
+    )
+
+
+def test_metrics_pool_and_caches(client, session, user):
+    instrument_engine(session.bind)
+    hashes = sample('password_hash_duration_seconds_count')
+
+    client.post(
+        '/auth/token',
+        data={
+            'username': user.email,
+            'password': user.clean_password,
+        },
+    )
+    response = client.get('/metrics')
+
+    assert (
+        sample('password_hash_duration_seconds_count') == hashes + 1
+    )
+    assert sample('db_pool_checked_out') >= 0
+    assert 'db_pool_overflow' in response.text
+    assert 'cache_hits_total{cache="token"}' in response.text
+    assert 'cache_misses_total{cache="todo_list"}' in response.text
+    assert 'cache_evictions_total{cache="token"}' in response.text
+    assert 'password_hash_queue_depth' in response.text
+
+
+def test_metrics_cache_counts_events_as_they_happen():
+    cache = LRUCache(max_entries=1)
+    instrument_cache('teste', cache)
+
+    cache.get('a')
+    cache.set('a', 1)
+    cache.get('a')
+    cache.set('b', 2)
+
+    assert sample('cache_hits_total', cache='teste') == 1
+    assert sample('cache_misses_total', cache='teste') == 1
+    assert sample('cache_evictions_total', cache='teste') == 1
+    assert sample('cache_entries', cache='teste') == 1
+
+
+def test_metrics_mark_process_dead(monkeypatch, tmp_path):
+    monkeypatch.setenv('PROMETHEUS_MULTIPROC_DIR', str(tmp_path))
+    (tmp_path / f'gauge_livesum_{os.getpid()}.db').touch()
+
+    mark_process_dead()
+
+    assert not list(tmp_path.iterdir())
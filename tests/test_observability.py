@@ -0,0 +1,88 @@
+import json
+import logging
+
+import pytest
+
+from fastapi_zero import observability
+from fastapi_zero.observability import parameter_shape
+
+
+@pytest.fixture
+def slow_queries(monkeypatch, caplog):
+    monkeypatch.setattr(
+        observability.settings, 'SLOW_QUERY_THRESHOLD_MS', 0
+    )
+    observability.slow_query_shapes.clear()
+    caplog.set_level(logging.WARNING, logger=observability.__name__)
+
+    def records():
+        return [
+            json.loads(record.getMessage())
+            for record in caplog.records
+            if record.name == observability.__name__
+        ]
+
+    return records
+
+
+def test_slow_query_log_includes_plan_and_route(
+    client, token, slow_queries
+):
+    client.get(
+        '/todos/?title=secret-value',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    logged = [
+        entry
+        for entry in slow_queries()
+        if 'FROM todos' in entry['statement']
+    ]
+    assert logged
+    entry = logged[0]
+    assert entry['event'] == 'slow_query'
+    assert entry['route'] == '/todos/'
+    assert 'secret-value' not in json.dumps(entry)
+    assert 'str' in entry['parameters']
+    assert entry['plan']
+    assert not entry['plan'][0].startswith('unavailable')
+
+
+def test_slow_query_log_deduplicates_by_shape(
+    client, token, slow_queries
+):
+    for _ in range(3):
+        client.get(
+            '/todos/?state=draft',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    statements = [entry['statement'] for entry in slow_queries()]
+    assert len(statements) == len(set(statements))
+
+
+def test_slow_query_log_disabled(
+    client, token, slow_queries, monkeypatch
+):
+    monkeypatch.setattr(
+        observability.settings, 'SLOW_QUERY_THRESHOLD_MS', None
+    )
+
+    client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert slow_queries() == []
+
+
+def test_parameter_shape():
+    assert parameter_shape((1, 'a', None), False) == [
+        'int',
+        'str',
+        'NoneType',
+    ]
+    assert parameter_shape({'id': 1}, False) == {'id': 'int'}
+    assert parameter_shape([(1,), (2,)], True) == {
+        'rows': 2,
+        'row': ['int'],
+    }
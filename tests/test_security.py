@@ -1,10 +1,26 @@
+import asyncio
 from http import HTTPStatus
 
+import pytest
+from freezegun import freeze_time
 from jwt import decode
+from jwt.exceptions import (
+    ExpiredSignatureError,
+    InvalidSignatureError,
+)
 
+from fastapi_zero import security
+from fastapi_zero.observability import RequestTimings, current_timings
 from fastapi_zero.security import (
+    PasswordHashPool,
+    PasswordHashPoolBusy,
     create_access_token,
+    decode_token,
+    get_current_user,
+    get_password_hash,
+    password_hash_pool,
     settings,
+    verify_password,
 )
 
 
@@ -29,3 +45,124 @@ def test_jwt_invalid_token(client):
     assert response.json() == {
         'detail': 'Could not validate credentials'
     }
+
+
+def test_get_current_user_issues_a_single_statement(
+    client, token, count_statements
+):
+    with count_statements() as statements:
+        response = client.post(
+            '/auth/refresh_token',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(statements) == 1
+    assert 'todos' not in statements[0]
+
+
+def test_password_hash_pool_saturated_returns_503(
+    client, monkeypatch
+):
+    monkeypatch.setattr(
+        password_hash_pool, 'pending', password_hash_pool.max_pending
+    )
+
+    response = client.post(
+        '/users/',
+        json={
+            'username': 'alice',
+            'email': 'alice@example.com',
+            'password': 'secret',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == str(
+        settings.PASSWORD_HASH_RETRY_AFTER
+    )
+
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_records_latency():
+    pool = PasswordHashPool(workers=1, queue_size=0)
+
+    hashed = await pool.run(get_password_hash, 'secret')
+
+    assert await pool.run(verify_password, 'secret', hashed)
+    assert pool.stats()['completed'] == 2  # noqa: PLR2004
+    assert pool.stats()['queue_depth'] == 0
+    assert pool.stats()['latency_max'] > 0
+
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_rejects_when_full():
+    pool = PasswordHashPool(workers=1, queue_size=0)
+    pool.pending = 1
+
+    with pytest.raises(PasswordHashPoolBusy):
+        await pool.run(get_password_hash, 'secret')
+
+    assert pool.stats()['rejected'] == 1
+
+
+def test_decode_token_uses_cache(monkeypatch):
+    token = create_access_token({'sub': 'cache@test.com'})
+    calls = []
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(security, 'decode', counting_decode)
+
+    assert decode_token(token)['sub'] == 'cache@test.com'
+    assert decode_token(token)['sub'] == 'cache@test.com'
+    assert len(calls) == 1
+
+
+def test_decode_token_cache_respects_expiration():
+    with freeze_time('2023-07-14 12:00:00'):
+        token = create_access_token({'sub': 'cache@test.com'})
+        decode_token(token)
+
+    with freeze_time('2023-07-14 12:31:00'):
+        with pytest.raises(ExpiredSignatureError):
+            decode_token(token)
+
+
+def test_decode_token_cache_bypassed_when_secret_changes(monkeypatch):
+    token = create_access_token({'sub': 'cache@test.com'})
+    decode_token(token)
+
+    monkeypatch.setattr(settings, 'SECRET_KEY', 'outra-chave')
+
+    with pytest.raises(InvalidSignatureError):
+        decode_token(token)
+
+
+@pytest.mark.asyncio
+async def test_auth_timing_excludes_principal_query(
+    session, user, monkeypatch
+):
+    execute = session.execute
+
+    async def slow_execute(statement):
+        await asyncio.sleep(0.05)
+        return await execute(statement)
+
+    monkeypatch.setattr(session, 'execute', slow_execute)
+    timings = RequestTimings()
+    reset = current_timings.set(timings)
+    try:
+        principal = await get_current_user(
+            session, create_access_token({'sub': user.email})
+        )
+    finally:
+        current_timings.reset(reset)
+
+    assert principal.id == user.id
+    # A consulta do principal é medida como db, não como auth
+    assert timings.phases['auth'] < 0.05  # noqa: PLR2004
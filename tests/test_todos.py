@@ -1,9 +1,45 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
 from http import HTTPStatus
 
 import factory.fuzzy
 import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, text, update
 
-from fastapi_zero.models import Todo, TodoState
+from fastapi_zero.app import app
+from fastapi_zero.cache import todo_list_cache
+from fastapi_zero.database import get_read_session
+from fastapi_zero.maintenance import (
+    compact_tombstones,
+    repair_todo_counts,
+)
+from fastapi_zero.models import (
+    Todo,
+    TodoState,
+    TodoStateCount,
+    TodoTombstone,
+)
+from fastapi_zero.pagination import encode_cursor
+from fastapi_zero.routers.todos import (
+    check_filter,
+    select_changes,
+    select_deleted,
+    select_export,
+    select_filtered_ids,
+    select_todo,
+    select_todo_version,
+    select_todos,
+    settings,
+)
+from fastapi_zero.schemas import (
+    FilterTodo,
+    FilterTodoBase,
+    FilterTodoExport,
+    TodoPublic,
+)
 
 
 class TodoFactory(factory.Factory):
@@ -38,6 +74,22 @@ def test_create_todo(client, token, mock_db_time):
     }
 
 
+def test_create_todo_issues_a_single_write(
+    client, token, count_statements
+):
+    with count_statements() as statements:
+        response = client.post(
+            '/todos/',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'title': 'Test todo', 'description': 'description'},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['created_at']
+    # autenticação + INSERT ... RETURNING
+    assert len(statements) == 2  # noqa: PLR2004
+
+
 @pytest.mark.asyncio
 async def test_list_todos_should_return_5_todos(
     session, client, user, token
@@ -70,6 +122,191 @@ async def test_list_todos_pagination_should_return_2_todos(
     assert len(response.json()['todos']) == expected_todos
 
 
+@pytest.mark.asyncio
+async def test_list_todos_etag_not_modified(
+    session, client, user, token
+):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+    etag = response.headers['ETag']
+
+    response = client.get(
+        '/todos/',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'If-None-Match': etag,
+        },
+    )
+
+    assert etag.startswith('W/')
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+
+def test_list_todos_etag_changes_after_write(client, token):
+    response = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+    etag = response.headers['ETag']
+
+    client.post(
+        '/todos/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'title': 'novo', 'description': 'novo'},
+    )
+    response = client.get(
+        '/todos/',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'If-None-Match': etag,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert len(response.json()['todos']) == 1
+
+
+def test_list_todos_etag_changes_after_update_same_second(
+    client, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    todo_id = client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'antes', 'description': 'x'},
+    ).json()['id']
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    client.patch(
+        f'/todos/{todo_id}', headers=headers, json={'title': 'depois'}
+    )
+    response = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['todos'][0]['title'] == 'depois'
+
+
+def test_list_todos_etag_depends_on_filter(client, token):
+    first = client.get(
+        '/todos/?limit=5',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    second = client.get(
+        '/todos/?limit=6',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert first.headers['ETag'] != second.headers['ETag']
+
+
+def test_list_todos_served_from_cache(
+    client, token, count_statements
+):
+    client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    with count_statements() as statements:
+        response = client.get(
+            '/todos/', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag']
+    # só a autenticação chega ao banco
+    assert len(statements) == 1
+
+
+def test_list_todos_cache_invalidated_by_writes(client, token):
+    client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+    response = client.post(
+        '/todos/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'title': 'novo', 'description': 'novo'},
+    )
+    todo_id = response.json()['id']
+
+    response = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert [t['id'] for t in response.json()['todos']] == [todo_id]
+
+    client.delete(
+        f'/todos/{todo_id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.json()['todos'] == []
+
+
+@pytest.mark.asyncio
+async def test_list_todos_cursor_pagination(
+    session, user, client, token
+):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    ids = []
+    cursor = ''
+    while True:
+        response = client.get(
+            f'/todos/?limit=2&cursor={cursor}',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        page = response.json()
+        ids += [todo['id'] for todo in page['todos']]
+        if not page['next_cursor']:
+            break
+        cursor = page['next_cursor']
+
+    assert ids == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_list_todos_cursor_with_filter(
+    session, user, client, token
+):
+    session.add_all(
+        TodoFactory.create_batch(
+            3, user_id=user.id, state=TodoState.done
+        )
+    )
+    session.add_all(
+        TodoFactory.create_batch(
+            3, user_id=user.id, state=TodoState.todo
+        )
+    )
+    await session.commit()
+
+    response = client.get(
+        '/todos/?state=todo&limit=2',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    first_page = response.json()
+
+    response = client.get(
+        f'/todos/?state=todo&limit=2&cursor={first_page["next_cursor"]}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert [todo['id'] for todo in first_page['todos']] == [4, 5]
+    assert [todo['id'] for todo in response.json()['todos']] == [6]
+    assert response.json()['next_cursor'] is None
+
+
 @pytest.mark.asyncio
 async def test_list_todos_filter_title_should_return_5_todos(
     session, user, client, token
@@ -165,6 +402,73 @@ async def test_list_todos_filter_combined_should_return_5_todos(
     assert len(response.json()['todos']) == expected_todos
 
 
+@pytest.mark.asyncio
+async def test_list_todos_search_ranks_by_relevance(
+    session, user, client, token
+):
+    session.add_all([
+        Todo(
+            title='Ir ao mercado',
+            description='comprar pão',
+            state=TodoState.todo,
+            user_id=user.id,
+        ),
+        Todo(
+            title='Mercado',
+            description='mercado: leite, ovos e café do mercado',
+            state=TodoState.todo,
+            user_id=user.id,
+        ),
+        Todo(
+            title='Estudar',
+            description='fastapi',
+            state=TodoState.todo,
+            user_id=user.id,
+        ),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/todos/?search=mercado',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert [todo['id'] for todo in response.json()['todos']] == [2, 1]
+    assert response.json()['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_follows_updates_and_deletes(
+    session, user, client, token
+):
+    todo = TodoFactory(user_id=user.id, title='rascunho')
+    other = TodoFactory(user_id=user.id, title='rascunho')
+    session.add_all([todo, other])
+    await session.commit()
+
+    client.patch(
+        f'/todos/{todo.id}',
+        json={'title': 'publicado'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    client.delete(
+        f'/todos/{other.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    response = client.get(
+        '/todos/?search=rascunho',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.json()['todos'] == []
+
+    response = client.get(
+        '/todos/?search=publicado',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert [t['id'] for t in response.json()['todos']] == [todo.id]
+
+
 @pytest.mark.asyncio
 async def test_delete_todo(session, client, user, token):
     todo = TodoFactory(user_id=user.id)
@@ -218,6 +522,241 @@ async def test_patch_todo(session, client, user, token):
     assert response.json()['title'] == 'teste!'
 
 
+@pytest.mark.asyncio
+async def test_export_todos_ndjson(
+    session, client, user, other_user, token
+):
+    session.add_all(
+        TodoFactory.create_batch(
+            3, user_id=user.id, state=TodoState.done
+        )
+    )
+    session.add_all(
+        TodoFactory.create_batch(
+            2, user_id=user.id, state=TodoState.todo
+        )
+    )
+    session.add(
+        TodoFactory(user_id=other_user.id, state=TodoState.done)
+    )
+    await session.commit()
+
+    response = client.get(
+        '/todos/export?state=done',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [line['id'] for line in lines] == [1, 2, 3]
+    assert {line['state'] for line in lines} == {'done'}
+
+
+@pytest.mark.asyncio
+async def test_export_todos_csv(
+    session, client, user, token, mock_db_time
+):
+    with mock_db_time(model=Todo) as time:
+        todo = TodoFactory(
+            user_id=user.id,
+            title='Título, com vírgula',
+            state=TodoState.draft,
+        )
+        session.add(todo)
+        await session.commit()
+
+    response = client.get(
+        '/todos/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert list(csv.reader(io.StringIO(response.text))) == [
+        [
+            'id',
+            'title',
+            'description',
+            'state',
+            'created_at',
+            'updated_at',
+        ],
+        [
+            str(todo.id),
+            'Título, com vírgula',
+            todo.description,
+            'draft',
+            time.isoformat(),
+            time.isoformat(),
+        ],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_todos_csv_in_chunks(
+    session, client, user, token, monkeypatch
+):
+    monkeypatch.setattr(settings, 'TODO_EXPORT_CHUNK_SIZE', 2)
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    rows = list(csv.reader(io.StringIO(response.text)))
+
+    assert rows[0][0] == 'id'
+    assert [row[0] for row in rows[1:]] == ['1', '2', '3', '4', '5']
+
+
+def test_export_todos_csv_empty(client, token):
+    response = client.get(
+        '/todos/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.text.splitlines() == [
+        'id,title,description,state,created_at,updated_at'
+    ]
+
+
+def test_create_todos_bulk(client, token, count_statements):
+    with count_statements() as statements:
+        response = client.post(
+            '/todos/bulk',
+            headers={'Authorization': f'Bearer {token}'},
+            json={
+                'todos': [
+                    {'title': f'todo {i}', 'description': 'bulk'}
+                    for i in range(3)
+                ]
+            },
+        )
+
+    results = response.json()['results']
+
+    assert response.status_code == HTTPStatus.OK
+    assert [r['id'] for r in results] == [1, 2, 3]
+    assert {r['status'] for r in results} == {HTTPStatus.CREATED}
+    assert [r['todo']['title'] for r in results] == [
+        'todo 0',
+        'todo 1',
+        'todo 2',
+    ]
+    # autenticação + INSERT em lote
+    assert len(statements) == 2  # noqa: PLR2004
+
+
+def test_create_todos_bulk_too_large(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_BULK_MAX_ITEMS', 1)
+
+    response = client.post(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'todos': [
+                {'title': 'a', 'description': 'a'},
+                {'title': 'b', 'description': 'b'},
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+    assert response.json() == {'detail': 'Batch too large (max 1)'}
+
+
+@pytest.mark.asyncio
+async def test_patch_todos_bulk(
+    session, client, user, other_user, token
+):
+    todos = TodoFactory.create_batch(
+        2, user_id=user.id, state=TodoState.todo
+    )
+    foreign = TodoFactory(user_id=other_user.id, title='alheio')
+    session.add_all([*todos, foreign])
+    await session.commit()
+
+    response = client.patch(
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'todos': [
+                {'id': todos[0].id, 'state': 'done'},
+                {'id': todos[1].id, 'title': 'novo'},
+                {'id': foreign.id, 'title': 'invadido'},
+            ]
+        },
+    )
+
+    results = response.json()['results']
+
+    assert response.status_code == HTTPStatus.OK
+    assert results[0]['todo']['state'] == 'done'
+    assert results[1]['todo']['title'] == 'novo'
+    assert results[1]['todo']['state'] == 'todo'
+    assert results[2] == {
+        'id': foreign.id,
+        'status': HTTPStatus.NOT_FOUND,
+        'todo': None,
+        'detail': 'Task not found.',
+    }
+
+    await session.refresh(foreign)
+    assert foreign.title == 'alheio'
+
+
+@pytest.mark.asyncio
+async def test_delete_todos_bulk(
+    session, client, user, other_user, token
+):
+    todos = TodoFactory.create_batch(2, user_id=user.id)
+    foreign = TodoFactory(user_id=other_user.id)
+    session.add_all([*todos, foreign])
+    await session.commit()
+
+    response = client.request(
+        'DELETE',
+        '/todos/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'ids': [todos[0].id, todos[1].id, foreign.id]},
+    )
+
+    statuses = [r['status'] for r in response.json()['results']]
+
+    assert response.status_code == HTTPStatus.OK
+    assert statuses == [
+        HTTPStatus.OK,
+        HTTPStatus.OK,
+        HTTPStatus.NOT_FOUND,
+    ]
+    assert await session.scalar(select(func.count(Todo.id))) == 1
+
+
+@pytest.mark.asyncio
+async def test_patch_todo_issues_a_single_write(
+    session, client, user, token, count_statements
+):
+    todo = TodoFactory(user_id=user.id, state=TodoState.todo)
+    session.add(todo)
+    await session.commit()
+
+    with count_statements() as statements:
+        response = client.patch(
+            f'/todos/{todo.id}',
+            json={'state': 'done'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['state'] == 'done'
+    assert response.json()['title'] == todo.title
+    # autenticação + UPDATE ... RETURNING
+    assert len(statements) == 2  # noqa: PLR2004
+    assert statements[1].startswith('UPDATE todos')
+
+
 @pytest.mark.asyncio
 async def test_list_todos_should_return_all_expecte(
     session, client, user, token, mock_db_time
@@ -245,3 +784,446 @@ async def test_list_todos_should_return_all_expecte(
     ]
 
 
+@pytest.mark.parametrize(
+    'query',
+    [
+        select_todos(1, FilterTodo()),
+        select_todos(1, FilterTodo(offset=20)),
+        select_todos(1, FilterTodo(state=TodoState.done)),
+        select_todos(1, FilterTodo(title='todo', description='desc')),
+        select_todos(
+            1,
+            FilterTodo(
+                state=TodoState.done, cursor=encode_cursor(10)
+            ),
+        ),
+        select_todos(1, FilterTodo(search='mercado')),
+        select_todo(1, 1),
+        select_todo_version(1, FilterTodo()),
+        select_todo_version(1, FilterTodo(state=TodoState.done)),
+        select_export(1, FilterTodoExport()),
+        select_export(1, FilterTodoExport(search='mercado')),
+        select_changes(1),
+        select_changes(1, datetime(2024, 1, 1)),
+        select_deleted(1, datetime(2024, 1, 1)),
+        select_filtered_ids(
+            1, FilterTodoBase(state=TodoState.done), 10
+        ),
+        select_filtered_ids(1, FilterTodoBase(title='mercado'), 0),
+    ],
+)
+@pytest.mark.asyncio
+async def test_todo_queries_do_not_scan_todos_table(session, query):
+    compiled = query.compile(
+        dialect=session.bind.dialect,
+        compile_kwargs={'literal_binds': True},
+    )
+
+    plan = await session.execute(
+        text(f'EXPLAIN QUERY PLAN {compiled}')
+    )
+    details = [row.detail for row in plan]
+
+    assert details
+    assert not [
+        d for d in details if d.split()[:2] == ['SCAN', 'todos']
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fast_json_responses_are_byte_identical(
+    session, client, user, token, monkeypatch
+):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def requests():
+        todo_list_cache.clear()
+        return [
+            client.get('/todos/?limit=2', headers=headers),
+            client.get('/todos/?search=a', headers=headers),
+            client.patch('/todos/1', json={}, headers=headers),
+        ]
+
+    default = requests()
+    monkeypatch.setattr(settings, 'FAST_JSON_RESPONSES', True)
+    fast = requests()
+
+    for expected, response in zip(default, fast):
+        assert response.status_code == expected.status_code
+        assert response.content == expected.content
+
+
+def test_fast_json_create_and_patch_todo(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'FAST_JSON_RESPONSES', True)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    created = client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'Test todo', 'description': 'desc'},
+    )
+    patched = client.patch(
+        f'/todos/{created.json()["id"]}',
+        headers=headers,
+        json={'state': 'done'},
+    )
+
+    assert created.status_code == HTTPStatus.OK
+    assert list(created.json()) == list(TodoPublic.model_fields)
+    assert created.json()['state'] == 'todo'
+    assert patched.json()['state'] == 'done'
+    assert patched.json()['title'] == 'Test todo'
+
+
+def test_fast_json_keeps_openapi_response_models(client, monkeypatch):
+    monkeypatch.setattr(settings, 'FAST_JSON_RESPONSES', True)
+
+    paths = client.get('/openapi.json').json()['paths']
+
+    def schema(path, method):
+        return paths[path][method]['responses']['200']['content'][
+            'application/json'
+        ]['schema']
+
+    assert schema('/todos/', 'get') == {
+        '$ref': '#/components/schemas/TodoList'
+    }
+    assert schema('/todos/', 'post') == {
+        '$ref': '#/components/schemas/TodoPublic'
+    }
+    assert schema('/todos/{todo_id}', 'patch') == {
+        '$ref': '#/components/schemas/TodoPublic'
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_todos_reads_replica_except_after_own_write(
+    client, token, replica_session, monkeypatch
+):
+    app.dependency_overrides[get_read_session] = lambda: (
+        replica_session
+    )
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'Test todo', 'description': 'desc'},
+    )
+    fresh = client.get('/todos/', headers=headers)
+
+    monkeypatch.setattr(
+        'fastapi_zero.cache.settings.READ_YOUR_WRITES_SECONDS', 0
+    )
+    todo_list_cache.clear()
+    stale = client.get('/todos/', headers=headers)
+
+    # Dentro da janela lê do primário, depois volta para a réplica
+    assert len(fresh.json()['todos']) == 1
+    assert stale.json()['todos'] == []
+
+
+@pytest.mark.asyncio
+async def test_todo_changes_full_sync(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/changes', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [todo['id'] for todo in response.json()['todos']] == [1, 2]
+    assert response.json()['deleted'] == []
+    assert response.json()['watermark']
+
+
+@pytest.mark.asyncio
+async def test_todo_changes_since_watermark(
+    session, client, user, token
+):
+    old, changed, removed = TodoFactory.create_batch(
+        3, user_id=user.id
+    )
+    session.add_all([old, changed, removed])
+    await session.commit()
+    now = await session.scalar(select(func.now()))
+    await session.execute(
+        update(Todo)
+        .where(Todo.id == old.id)
+        .values(updated_at=now - timedelta(hours=2))
+    )
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.delete(f'/todos/{removed.id}', headers=headers)
+    response = client.get(
+        '/todos/changes',
+        params={'since': (now - timedelta(hours=1)).isoformat()},
+        headers=headers,
+    )
+
+    assert [todo['id'] for todo in response.json()['todos']] == [
+        changed.id
+    ]
+    assert response.json()['deleted'] == [removed.id]
+
+
+@pytest.mark.asyncio
+async def test_todo_changes_since_includes_boundary(
+    session, client, user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    created = client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'a', 'description': 'a'},
+    ).json()
+    session.add(TodoTombstone(todo_id=99, user_id=user.id))
+    await session.commit()
+    deleted_at = await session.scalar(
+        select(TodoTombstone.deleted_at)
+    )
+
+    todos = client.get(
+        '/todos/changes',
+        params={'since': created['updated_at']},
+        headers=headers,
+    )
+    deleted = client.get(
+        '/todos/changes',
+        params={'since': deleted_at.isoformat()},
+        headers=headers,
+    )
+
+    assert [todo['id'] for todo in todos.json()['todos']] == [
+        created['id']
+    ]
+    assert deleted.json()['deleted'] == [99]
+
+
+@pytest.mark.asyncio
+async def test_todo_changes_reused_id_is_not_deleted(
+    session, client, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    since = await session.scalar(select(func.now()))
+    first = client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'a', 'description': 'a'},
+    ).json()
+    client.delete(f'/todos/{first["id"]}', headers=headers)
+    # Sem AUTOINCREMENT o SQLite devolve o mesmo id
+    second = client.post(
+        '/todos/',
+        headers=headers,
+        json={'title': 'b', 'description': 'b'},
+    ).json()
+
+    response = client.get(
+        '/todos/changes',
+        params={'since': since.isoformat()},
+        headers=headers,
+    )
+
+    assert second['id'] == first['id']
+    assert [todo['id'] for todo in response.json()['todos']] == [
+        second['id']
+    ]
+    assert response.json()['deleted'] == []
+
+
+def test_todo_changes_watermark_too_old(client, token):
+    response = client.get(
+        '/todos/changes',
+        params={'since': '2000-01-01T00:00:00+00:00'},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.GONE
+
+
+@pytest.mark.asyncio
+async def test_compact_tombstones_keeps_retention_window(session):
+    now = await session.scalar(select(func.now()))
+    session.add_all([
+        TodoTombstone(todo_id=1, user_id=1),
+        TodoTombstone(todo_id=2, user_id=1),
+    ])
+    await session.commit()
+    await session.execute(
+        update(TodoTombstone)
+        .where(TodoTombstone.todo_id == 1)
+        .values(deleted_at=now - timedelta(days=365))
+    )
+
+    assert await compact_tombstones(session) == 1
+    remaining = await session.scalars(select(TodoTombstone.todo_id))
+    assert remaining.all() == [2]
+
+
+@pytest.mark.asyncio
+async def test_todo_summary_follows_writes(
+    session, client, user, token
+):
+    session.add_all([
+        TodoFactory(user_id=user.id, state=TodoState.draft),
+        TodoFactory(user_id=user.id, state=TodoState.draft),
+        TodoFactory(user_id=user.id, state=TodoState.done),
+    ])
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.patch('/todos/1', json={'state': 'doing'}, headers=headers)
+    client.patch('/todos/2', json={'title': 'novo'}, headers=headers)
+    client.delete('/todos/3', headers=headers)
+    client.post(
+        '/todos/bulk',
+        json={'todos': [{'title': 'a', 'description': 'b'}]},
+        headers=headers,
+    )
+    response = client.get('/todos/summary', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'counts': {
+            'draft': 1,
+            'todo': 1,
+            'doing': 1,
+            'done': 0,
+            'trash': 0,
+        },
+        'total': 3,
+    }
+
+
+@pytest.mark.asyncio
+async def test_repair_todo_counts_fixes_drift(session, user, caplog):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    expected = (
+        await session.execute(
+            select(TodoStateCount.state, TodoStateCount.count)
+        )
+    ).all()
+    await session.execute(
+        update(TodoStateCount).values(count=TodoStateCount.count + 5)
+    )
+    await session.commit()
+
+    drift = await repair_todo_counts(session)
+    counts = (
+        await session.execute(
+            select(TodoStateCount.state, TodoStateCount.count)
+        )
+    ).all()
+
+    assert drift == len(expected)
+    assert sorted(counts) == sorted(expected)
+    assert 'todo count drift' in caplog.text
+    assert await repair_todo_counts(session) == 0
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_FILTER_BATCH_SIZE', 2)
+
+
+@pytest.mark.usefixtures('small_batches')
+@pytest.mark.asyncio
+async def test_patch_todos_by_filter_in_batches(
+    session, client, user, token, count_statements
+):
+    session.add_all([
+        *TodoFactory.create_batch(
+            5, user_id=user.id, state=TodoState.done
+        ),
+        TodoFactory(user_id=user.id, state=TodoState.todo),
+        TodoFactory(user_id=user.id + 1, state=TodoState.done),
+    ])
+    await session.commit()
+
+    with count_statements() as statements:
+        response = client.patch(
+            '/todos/?state=done',
+            json={'state': 'trash'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    states = await session.scalars(
+        select(Todo.state).order_by(Todo.id)
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'affected': 5}
+    assert states.all() == [
+        *[TodoState.trash] * 5,
+        TodoState.todo,
+        TodoState.done,
+    ]
+    # Lotes de 2, 2 e 1: três UPDATEs
+    updates = [s for s in statements if s.startswith('UPDATE todos')]
+    assert len(updates) == 3  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_delete_todos_by_filter_empties_trash(
+    session, client, user, token
+):
+    session.add_all([
+        *TodoFactory.create_batch(
+            3, user_id=user.id, state=TodoState.trash
+        ),
+        TodoFactory(user_id=user.id, state=TodoState.done),
+    ])
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.delete('/todos/?state=trash', headers=headers)
+    summary = client.get('/todos/summary', headers=headers).json()
+
+    assert response.json() == {'affected': 3}
+    assert summary['counts']['trash'] == 0
+    assert summary['total'] == 1
+    tombstones = await session.scalars(select(TodoTombstone.todo_id))
+    assert sorted(tombstones.all()) == [1, 2, 3]
+
+
+def test_todos_by_filter_requires_a_filter(client, token):
+    response = client.delete(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('method', ['PATCH', 'DELETE'])
+async def test_todos_by_filter_rejects_empty_description(
+    session, client, user, token, method
+):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.request(
+        method,
+        '/todos/?description=',
+        headers=headers,
+        json={'title': 'sobrescrito'} if method == 'PATCH' else None,
+    )
+    todos = client.get('/todos/', headers=headers).json()['todos']
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert len(todos) == 3  # noqa: PLR2004
+    assert 'sobrescrito' not in {todo['title'] for todo in todos}
+
+
+def test_check_filter_ignores_filters_that_do_not_apply():
+    # Mesmo sem a validação do schema, '' não conta como filtro
+    with pytest.raises(HTTPException) as error:
+        check_filter(FilterTodoBase.model_construct(description=''))
+
+    assert error.value.status_code == HTTPStatus.BAD_REQUEST
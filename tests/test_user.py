@@ -1,5 +1,12 @@
 from http import HTTPStatus
 
+import pytest
+from sqlalchemy import func, select
+
+from fastapi_zero.app import app
+from fastapi_zero.cache import wrote_recently
+from fastapi_zero.database import get_read_session
+from fastapi_zero.models import Todo, TodoState
 from fastapi_zero.schemas import UserPublic
 from fastapi_zero.security import create_access_token
 
@@ -17,6 +24,24 @@ def test_create_user(client):
     assert response.status_code == HTTPStatus.CREATED
 
 
+def test_create_user_issues_a_single_statement(
+    client, count_statements
+):
+    with count_statements() as statements:
+        response = client.post(
+            '/users/',
+            json={
+                'username': 'alice',
+                'email': 'alice@example.com',
+                'password': 'secret',
+            },
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert len(statements) == 1
+    assert 'RETURNING' in statements[0]
+
+
 def test_create_user_username_already_registered(client):
     response1 = client.post(
         '/users/',
@@ -81,7 +106,7 @@ def test_read_user(client):
     response = client.get('/users/')
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': []}
+    assert response.json() == {'users': [], 'next_cursor': None}
 
 
 def test_read_users_with_users(client, user):
@@ -89,7 +114,33 @@ def test_read_users_with_users(client, user):
     response = client.get('/users/')
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {
+        'users': [user_schema],
+        'next_cursor': None,
+    }
+
+
+def test_read_users_cursor_pagination(client, user, other_user):
+    response = client.get('/users/?limit=1')
+    first_page = response.json()
+
+    assert [u['id'] for u in first_page['users']] == [user.id]
+    assert first_page['next_cursor']
+
+    response = client.get(
+        f'/users/?limit=1&cursor={first_page["next_cursor"]}'
+    )
+
+    assert [u['id'] for u in response.json()['users']] == [
+        other_user.id
+    ]
+
+
+def test_read_users_invalid_cursor(client):
+    response = client.get('/users/?cursor=invalido')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
 
 
 def test_update_user(client, user, token):
@@ -110,6 +161,45 @@ def test_update_user(client, user, token):
         'email': 'bob@example.com',
         'id': user.id,
     }
+    # Leituras seguintes do próprio usuário vão ao primário
+    assert wrote_recently(user.id)
+
+
+def test_update_user_issues_a_single_write(
+    client, user, token, count_statements
+):
+    with count_statements() as statements:
+        response = client.put(
+            f'/users/{user.id}',
+            headers={'Authorization': f'Bearer {token}'},
+            json={
+                'username': 'bob',
+                'email': 'bob@example.com',
+                'password': 'secret',
+            },
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    # autenticação + UPDATE ... RETURNING
+    assert len(statements) == 2  # noqa: PLR2004
+    assert statements[1].startswith('UPDATE users')
+
+
+def test_update_user_username_already_registered(
+    client, user, other_user, token
+):
+    response = client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': other_user.username,
+            'email': 'bob@example.com',
+            'password': 'secret',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Username ja existe'}
 
 
 def test_delete_user(client, user, token):
@@ -122,6 +212,27 @@ def test_delete_user(client, user, token):
     assert response.json() == {'message': 'user delete'}
 
 
+@pytest.mark.asyncio
+async def test_delete_user_with_todos(session, client, user, token):
+    session.add(
+        Todo(
+            title='title',
+            description='description',
+            state=TodoState.todo,
+            user_id=user.id,
+        )
+    )
+    await session.commit()
+
+    response = client.delete(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert await session.scalar(select(func.count(Todo.id))) == 0
+
+
 def test_update_not_found(client, token, other_user):
     response = client.put(
         f'/users/{other_user.id}',
@@ -158,6 +269,45 @@ def test_read_user_by_id(client, user, token):
     assert response.json() == user_schema
 
 
+def test_read_user_by_id_etag(client, user, token):
+    response = client.get(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    etag = response.headers['ETag']
+
+    response = client.get(
+        f'/users/{user.id}',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'If-None-Match': etag,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'bob',
+            'email': user.email,
+            'password': 'secret',
+        },
+    )
+    response = client.get(
+        f'/users/{user.id}',
+        headers={
+            'Authorization': f'Bearer {token}',
+            'If-None-Match': etag,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'bob'
+
+
 def test_read_user_by_id_not_found(client, other_user, token):
     response = client.get(
         f'/users/{other_user.id}',
@@ -166,3 +316,31 @@ def test_read_user_by_id_not_found(client, other_user, token):
 
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == {'detail': 'Sem permissão'}
+
+
+def test_new_user_reads_own_profile_before_replica_catches_up(
+    client, replica_session
+):
+    app.dependency_overrides[get_read_session] = lambda: (
+        replica_session
+    )
+    created = client.post(
+        '/users/',
+        json={
+            'username': 'novo',
+            'email': 'novo@example.com',
+            'password': 'secret',
+        },
+    ).json()
+    token = client.post(
+        '/auth/token',
+        data={'username': 'novo@example.com', 'password': 'secret'},
+    ).json()['access_token']
+
+    response = client.get(
+        f'/users/{created["id"]}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'novo'